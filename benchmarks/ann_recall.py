@@ -0,0 +1,96 @@
+"""
+Recall vs latency of the IVF index against exact matmul search, on
+synthetic clustered embeddings, plus the nprobe that build-time
+calibration picks for settings.ann_target_recall.
+
+Usage:
+    python benchmarks/ann_recall.py [num_vectors] [dim]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from src.config import settings
+from src.retrieval.ann import IVFIndex, _normalize
+
+TOP_K = 10
+NUM_QUERIES = 200
+NPROBES = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+def clustered_vectors(num_vectors: int, dim: int, num_topics: int = 1000, seed: int = 7) -> np.ndarray:
+    """Normalized points scattered around random topic directions."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((num_topics, dim)).astype(np.float32)
+    labels = rng.integers(num_topics, size=num_vectors)
+    noise = rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    return _normalize(topics[labels] + 1.3 * noise)
+
+
+def exact_search(vectors: np.ndarray, query: np.ndarray, top_k: int) -> np.ndarray:
+    scores = vectors @ query
+    best = np.argpartition(scores, -top_k)[-top_k:]
+    return best[np.argsort(-scores[best])]
+
+
+def timed(fn, queries) -> tuple[list, float]:
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return results, (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def recall(results, truth) -> float:
+    return float(np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)]))
+
+
+def main():
+    num_vectors = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 128
+    console = Console()
+
+    data = clustered_vectors(num_vectors + NUM_QUERIES, dim)
+    vectors, queries = data[:num_vectors], data[num_vectors:]
+    truth, exact_us = timed(lambda q: exact_search(vectors, q, TOP_K), queries)
+
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors)
+    build_s = time.perf_counter() - start
+
+    # Same data, but the last 10% arrives through add() after training
+    split = int(num_vectors * 0.9)
+    incremental = IVFIndex.build(vectors[:split])
+    incremental.add(vectors[split:])
+
+    table = Table(title=f"IVF recall@{TOP_K}: {num_vectors:,} x {dim}, nlist={index.nlist}, build {build_s:.1f}s")
+    table.add_column("nprobe", justify="right")
+    table.add_column("Recall", justify="right")
+    table.add_column("Recall (10% added)", justify="right")
+    table.add_column("µs/query", justify="right")
+    table.add_column("Speedup vs exact", justify="right")
+
+    calibrated = index.calibrate_nprobe(vectors, settings.ann_target_recall, top_k=TOP_K)
+    for nprobe in sorted(set(n for n in NPROBES if n <= index.nlist) | {calibrated}):
+        results, ivf_us = timed(lambda q: index.search(q, TOP_K, nprobe=nprobe)[0], queries)
+        added = [incremental.search(q, TOP_K, nprobe=nprobe)[0] for q in queries]
+        label = f"{nprobe} (calibrated)" if nprobe == calibrated else str(nprobe)
+        table.add_row(
+            label,
+            f"{recall(results, truth):.3f}",
+            f"{recall(added, truth):.3f}",
+            f"{ivf_us:.0f}",
+            f"{exact_us / ivf_us:.1f}x",
+        )
+    table.add_row("exact", "1.000", "1.000", f"{exact_us:.0f}", "1.0x")
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark: BM25Index.search (MaxScore) vs exhaustive term-at-a-time
+scoring, on the real corpus and on synthetic corpora built from its words.
+
+Usage:
+    python benchmarks/bm25_search.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from src.config import settings
+from src.ingestion.chunker import MarkdownChunker
+from src.retrieval.bm25 import BM25Index, tokenize
+
+QUERIES = [
+    "Life Path 7",
+    "What careers suit Life Path 7?",
+    "Dragon compatibility with Rat",
+    "lucky colors for the Year of the Dog",
+    "master number 11 spiritual meaning",
+    "which zodiac signs are compatible with the Ox",
+    "life path 3 relationships and love",
+    "fire element personality traits",
+]
+
+
+def exhaustive_search(index: BM25Index, query: str, top_k: int) -> list[tuple[int, float]]:
+    """Reference: score every posting of every query term."""
+    term_ids = sorted(
+        {index.terms[t] for t in tokenize(query) if t in index.terms},
+        key=lambda t: index.max_impacts[t],
+        reverse=True,
+    )
+    scores = np.zeros(len(index), dtype=np.float32)
+    for term_id in term_ids:
+        docs, impacts = index._postings(term_id)
+        scores[docs] += impacts
+    hits = np.flatnonzero(scores)
+    order = np.lexsort((hits, -scores[hits]))[:top_k]
+    return [(int(hits[j]), float(scores[hits[j]])) for j in order]
+
+
+def synthetic_corpus(texts: list[str], num_docs: int, seed: int = 7) -> list[str]:
+    """Documents sampled from the corpus' own word distribution."""
+    rng = random.Random(seed)
+    words = [w for text in texts for w in tokenize(text)]
+    lengths = [len(tokenize(text)) for text in texts]
+    return [" ".join(rng.choices(words, k=rng.choice(lengths))) for _ in range(num_docs)]
+
+
+def per_query_us(fn, repeats: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for query in QUERIES:
+            fn(query)
+        best = min(best, time.perf_counter() - start)
+    return best / len(QUERIES) * 1e6
+
+
+def main():
+    console = Console()
+    chunks = MarkdownChunker(
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+    ).chunk_directory(settings.data_raw_dir)
+    texts = [" ".join(c.headers) + "\n" + c.content for c in chunks]
+
+    corpora = {"data/raw": texts}
+    for num_docs in (10_000, 100_000):
+        corpora[f"synthetic {num_docs:,}"] = synthetic_corpus(texts, num_docs)
+
+    table = Table(title="BM25 top-10: exhaustive vs MaxScore")
+    table.add_column("Corpus")
+    table.add_column("Docs", justify="right")
+    table.add_column("Postings", justify="right")
+    table.add_column("Build s", justify="right")
+    table.add_column("Exhaustive µs", justify="right")
+    table.add_column("MaxScore µs", justify="right")
+    table.add_column("Speedup", justify="right")
+
+    for name, corpus in corpora.items():
+        start = time.perf_counter()
+        index = BM25Index()
+        index.build(corpus)
+        build_s = time.perf_counter() - start
+
+        for query in QUERIES:
+            assert index.search(query, 10) == exhaustive_search(index, query, 10), query
+
+        exhaustive_us = per_query_us(lambda q: exhaustive_search(index, q, 10))
+        maxscore_us = per_query_us(lambda q: index.search(q, 10))
+        table.add_row(
+            name,
+            f"{len(index):,}",
+            f"{len(index.doc_ids):,}",
+            f"{build_s:.2f}",
+            f"{exhaustive_us:.0f}",
+            f"{maxscore_us:.0f}",
+            f"{exhaustive_us / maxscore_us:.2f}x",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Micro-benchmark: MarkdownChunker._recursive_split vs the previous
+concatenation-based implementation on multi-megabyte markdown.
+
+That both produce identical chunks is checked by
+tests/test_chunker_split.py, not here.
+
+Usage:
+    python benchmarks/chunker_split.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+
+from src.ingestion.chunker import MarkdownChunker
+
+
+def legacy_recursive_split(chunker: MarkdownChunker, text: str) -> list[str]:
+    """The pre-offset implementation, kept verbatim as the reference."""
+    if len(text) <= chunker.chunk_size:
+        return [text]
+
+    chunks = []
+    separators = ['\n\n', '\n', '. ', '! ', '? ']
+
+    for separator in separators:
+        if separator in text:
+            parts = text.split(separator)
+            current_chunk = ""
+
+            for part in parts:
+                part_with_sep = part + (separator if separator not in ['\n\n', '\n'] else '\n')
+
+                if len(current_chunk) + len(part_with_sep) <= chunker.chunk_size:
+                    current_chunk += part_with_sep
+                else:
+                    if current_chunk:
+                        chunks.append(current_chunk.strip())
+
+                    if chunker.chunk_overlap > 0 and current_chunk:
+                        overlap_text = current_chunk[-chunker.chunk_overlap:]
+                        current_chunk = overlap_text + part_with_sep
+                    else:
+                        current_chunk = part_with_sep
+
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+
+            if chunks:
+                return chunks
+
+    chunks = []
+    for i in range(0, len(text), chunker.chunk_size - chunker.chunk_overlap):
+        chunk = text[i:i + chunker.chunk_size]
+        if chunk.strip():
+            chunks.append(chunk.strip())
+
+    return chunks
+
+
+def make_section(num_paragraphs: int, seed: int = 7) -> str:
+    """One long markdown section of random paragraphs (~180 chars each)."""
+    rng = random.Random(seed)
+    words = (
+        "the dragon is a powerful sign born in years of fire water metal "
+        "wood earth life path seven seeks truth through study and solitude"
+    ).split()
+
+    def sentence() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(5, 15)))
+
+    return "\n\n".join(
+        ". ".join(sentence() for _ in range(rng.randint(1, 6))) + "."
+        for _ in range(num_paragraphs)
+    )
+
+
+def best_of(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    console = Console()
+    section = make_section(40_000)
+    inputs = {
+        "paragraphs": section,
+        "lines": section.replace("\n\n", "\n").replace(". ", ".\n"),
+        "sentences": section.replace("\n\n", " "),
+    }
+
+    table = Table(title="_recursive_split: legacy vs offset-based")
+    table.add_column("Separator")
+    table.add_column("Size MB", justify="right")
+    table.add_column("chunk_size", justify="right")
+    table.add_column("Chunks", justify="right")
+    table.add_column("Legacy ms", justify="right")
+    table.add_column("Offsets ms", justify="right")
+    table.add_column("Speedup", justify="right")
+
+    for name, text in inputs.items():
+        for chunk_size, chunk_overlap in [(512, 50), (2048, 200), (8192, 800)]:
+            chunker = MarkdownChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+            chunks = chunker._recursive_split(text)
+            legacy_s = best_of(lambda: legacy_recursive_split(chunker, text))
+            new_s = best_of(lambda: chunker._recursive_split(text))
+            table.add_row(
+                name,
+                f"{len(text) / 1e6:.1f}",
+                str(chunk_size),
+                str(len(chunks)),
+                f"{legacy_s * 1000:.1f}",
+                f"{new_s * 1000:.1f}",
+                f"{legacy_s / new_s:.2f}x",
+            )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Recall of int8 / binary quantized search with oversampling + float
+rescoring, simulated in numpy the way Qdrant applies it.
+
+- int8: every component is mapped linearly onto [-127, 127] using the
+  0.99 quantile of absolute values (Qdrant's `quantile=0.99`)
+- binary: one sign bit per component, scored by Hamming similarity
+
+The numpy simulation is not timed: numpy has no int8 or popcount SIMD
+kernels, so its timings would say nothing about Qdrant's quantized scan.
+With --qdrant, the same vectors are also loaded into temporary
+collections (none / int8 / binary) on the configured Qdrant server and
+searched through QdrantVectorStore, which reports real per-query latency
+(HNSW included, so recall there is end to end).
+
+Usage:
+    python benchmarks/quantization.py [num_vectors] [dim] [--qdrant]
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from src.config import settings
+from src.ingestion.indexer import quantization_config
+from src.retrieval.vector_store import QdrantVectorStore
+
+from ann_recall import clustered_vectors, exact_search, recall
+
+TOP_K = 10
+NUM_QUERIES = 200
+OVERSAMPLING = [1.0, 2.0, 4.0]
+
+# Popcount of every byte value, for Hamming distance on packed bits
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors: np.ndarray, quantile: float = 0.99) -> tuple[np.ndarray, float]:
+    scale = float(np.quantile(np.abs(vectors), quantile)) / 127
+    return np.clip(np.round(vectors / scale), -127, 127).astype(np.int8), scale
+
+
+def rescored(candidates: np.ndarray, vectors: np.ndarray, query: np.ndarray, top_k: int) -> np.ndarray:
+    scores = vectors[candidates] @ query
+    return candidates[np.argsort(-scores)[:top_k]]
+
+
+def top(scores: np.ndarray, n: int) -> np.ndarray:
+    return np.argpartition(scores, -n)[-n:]
+
+
+def qdrant_latency(vectors: np.ndarray, queries: np.ndarray, truth: list, console: Console) -> None:
+    """Recall and per-query latency of each quantization mode on the Qdrant server."""
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import CollectionStatus, Distance, VectorParams
+
+    client = QdrantClient(host=settings.qdrant_host, port=settings.qdrant_port)
+    table = Table(title=f"Qdrant search, {len(vectors):,} x {vectors.shape[1]}, top {TOP_K}")
+    table.add_column("Mode")
+    table.add_column("Oversampling", justify="right")
+    table.add_column("Recall", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p95 ms", justify="right")
+
+    for mode in ("none", "int8", "binary"):
+        collection = f"bench_quantization_{mode}"
+        if client.collection_exists(collection):
+            client.delete_collection(collection)
+        client.create_collection(
+            collection_name=collection,
+            vectors_config=VectorParams(
+                size=vectors.shape[1],
+                distance=Distance.COSINE,
+                on_disk=settings.qdrant_vectors_on_disk,
+            ),
+            quantization_config=quantization_config(mode),
+        )
+        try:
+            client.upload_collection(
+                collection_name=collection,
+                vectors=vectors,
+                payload=({"row": i} for i in range(len(vectors))),
+                ids=range(len(vectors)),
+            )
+            # Wait for indexing (and quantization) to finish before timing
+            while client.get_collection(collection).status != CollectionStatus.GREEN:
+                time.sleep(1)
+
+            for oversampling in OVERSAMPLING if mode != "none" else [1.0]:
+                store = QdrantVectorStore(client, collection, quantization=mode, oversampling=oversampling)
+                store.search(queries[0].tolist(), TOP_K)  # warm-up
+                results, times = [], []
+                for q in queries:
+                    start = time.perf_counter()
+                    hits = store.search(q.tolist(), TOP_K)
+                    times.append((time.perf_counter() - start) * 1000)
+                    results.append([payload["row"] for payload, _ in hits])
+                table.add_row(
+                    mode,
+                    "-" if mode == "none" else f"{oversampling:g}x",
+                    f"{recall(results, truth):.3f}",
+                    f"{statistics.median(times):.2f}",
+                    f"{np.percentile(times, 95):.2f}",
+                )
+        finally:
+            client.delete_collection(collection)
+
+    console.print(table)
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    num_vectors = int(args[0]) if len(args) > 0 else 100_000
+    dim = int(args[1]) if len(args) > 1 else 768
+    console = Console()
+
+    data = clustered_vectors(num_vectors + NUM_QUERIES, dim)
+    vectors, queries = data[:num_vectors], data[num_vectors:]
+
+    truth = [exact_search(vectors, q, TOP_K) for q in queries]
+
+    codes, scale = quantize_int8(vectors)
+    codes_f32 = codes.astype(np.float32)
+    bits = np.packbits(vectors > 0, axis=1)
+
+    table = Table(title=f"Quantized search, {num_vectors:,} x {dim}, recall@{TOP_K} after rescoring")
+    table.add_column("Mode")
+    table.add_column("Bytes/vector", justify="right")
+    table.add_column("Memory (1M vectors)", justify="right")
+    table.add_column("Oversampling", justify="right")
+    table.add_column("Recall", justify="right")
+
+    table.add_row("float32", str(dim * 4), f"{dim * 4:,} MB", "-", "1.000")
+
+    for oversampling in OVERSAMPLING:
+        limit = int(TOP_K * oversampling)
+        results = [
+            rescored(top(codes_f32 @ (q / scale), limit), vectors, q, TOP_K)
+            for q in queries
+        ]
+        table.add_row("int8", str(dim), f"{dim:,} MB", f"{oversampling:g}x", f"{recall(results, truth):.3f}")
+
+    for oversampling in OVERSAMPLING:
+        limit = int(TOP_K * oversampling)
+        results = []
+        for q in queries:
+            query_bits = np.packbits(q > 0)
+            hamming = _POPCOUNT[np.bitwise_xor(bits, query_bits)].sum(axis=1, dtype=np.int32)
+            results.append(rescored(top(-hamming, limit), vectors, q, TOP_K))
+        table.add_row("binary", str(dim // 8), f"{dim // 8:,} MB", f"{oversampling:g}x", f"{recall(results, truth):.3f}")
+
+    console.print(table)
+
+    if "--qdrant" in sys.argv:
+        qdrant_latency(vectors, queries, truth, console)
+
+
+if __name__ == "__main__":
+    main()
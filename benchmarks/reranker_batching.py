@@ -0,0 +1,139 @@
+"""
+Padding cost of length-bucketed reranker batches vs batches in arrival
+order, on the same candidate sets as benchmarks/reranker_onnx.py.
+
+A batch pads every pair to its longest one, and the cross-encoder spends
+FLOPs on every padded token, so padded tokens are the cost measure here.
+Token lengths use the approximate counter the reranker buckets with.
+
+If an exported ONNX model exists (python -m src.retrieval.onnx_cross_encoder),
+per-query latency of both batchings is measured too, and so is
+throughput under concurrent requests with the cross-request
+RerankService (settings.rerank_batching) off and on: queries per second
+and the number of model forward passes they took.
+
+Usage:
+    python benchmarks/reranker_batching.py [repeats]
+"""
+
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+
+from src.config import settings
+from src.ingestion.tokenizer import approx_token_count
+from src.retrieval.onnx_cross_encoder import FP32_FILE, OnnxCrossEncoder
+from src.retrieval.rerank_service import RerankService
+from src.retrieval.reranker import Reranker, length_batches
+
+from reranker_onnx import CANDIDATES, QUERIES, candidate_sets
+
+BATCH_SIZES = [4, 8, 16, 32]
+CONCURRENCY = [1, 4, 8, 16]
+
+
+def pair_lengths(pairs: list[tuple[str, str]]) -> list[int]:
+    return [
+        min(approx_token_count(q) + approx_token_count(p) + 3, settings.reranker_max_tokens)
+        for q, p in pairs
+    ]
+
+
+def arrival_batches(n: int, batch_size: int) -> list[list[int]]:
+    return [list(range(start, min(start + batch_size, n))) for start in range(0, n, batch_size)]
+
+
+def padded_tokens(lengths: list[int], batches: list[list[int]]) -> int:
+    return sum(max(lengths[i] for i in batch) * len(batch) for batch in batches)
+
+
+def per_query_ms(model, pair_sets: list, batch_fn, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        for pairs in pair_sets:
+            start = time.perf_counter()
+            for batch in batch_fn(pairs):
+                model.predict([pairs[i] for i in batch], batch_size=len(batch))
+            times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def concurrent_throughput(reranker: Reranker, pair_sets: list, concurrency: int, repeats: int) -> tuple[float, int]:
+    """Queries/s and forward passes for pair_sets x repeats reranked by `concurrency` threads."""
+    work = pair_sets * repeats
+    predict = reranker.scheduler.submit if reranker.scheduler else reranker._predict
+    passes = reranker.padding_stats["batches"]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(predict, work))
+        elapsed = time.perf_counter() - start
+    return len(work) / elapsed, reranker.padding_stats["batches"] - passes
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    console = Console()
+    pair_sets = candidate_sets()
+    lengths = [pair_lengths(pairs) for pairs in pair_sets]
+    real = sum(sum(ls) for ls in lengths)
+
+    table = Table(title=f"Padded tokens, {CANDIDATES} candidates x {len(QUERIES)} queries ({real:,} real tokens)")
+    table.add_column("Batch size", justify="right")
+    table.add_column("Arrival order", justify="right")
+    table.add_column("Length-bucketed", justify="right")
+    table.add_column("Padding cut", justify="right")
+    for batch_size in BATCH_SIZES:
+        plain = sum(padded_tokens(ls, arrival_batches(len(ls), batch_size)) for ls in lengths)
+        bucketed = sum(padded_tokens(ls, length_batches(ls, batch_size)) for ls in lengths)
+        table.add_row(str(batch_size), f"{plain:,}", f"{bucketed:,}", f"{1 - bucketed / plain:.1%}")
+    console.print(table)
+
+    if not (settings.reranker_onnx_dir / FP32_FILE).exists():
+        console.print("[yellow]No exported ONNX model, skipping latency[/yellow]")
+        return
+
+    model = OnnxCrossEncoder(settings.reranker_onnx_dir, threads=settings.reranker_threads)
+    batch_size = settings.reranker_batch_size
+    model.predict(pair_sets[0])  # warm-up
+    plain_ms = per_query_ms(model, pair_sets, lambda p: arrival_batches(len(p), batch_size), repeats)
+    bucketed_ms = per_query_ms(model, pair_sets, lambda p: length_batches(pair_lengths(p), batch_size), repeats)
+
+    latency = Table(title=f"ONNX fp32 rerank latency, batch size {batch_size}")
+    latency.add_column("Batching")
+    latency.add_column("ms/query", justify="right")
+    latency.add_row("Arrival order", f"{plain_ms:.1f}")
+    latency.add_row("Length-bucketed", f"{bucketed_ms:.1f}")
+    console.print(latency)
+
+    # Calls the model directly (Reranker._predict), so the score cache doesn't hide repeats
+    reranker = Reranker(backend="onnx")
+    throughput = Table(
+        title=f"Concurrent reranks, {len(QUERIES) * repeats} queries of {CANDIDATES} pairs "
+        f"(service: wait {settings.rerank_batch_wait_ms:g} ms, max {settings.rerank_batch_max_pairs} pairs)"
+    )
+    throughput.add_column("Concurrency", justify="right")
+    throughput.add_column("Service")
+    throughput.add_column("Queries/s", justify="right")
+    throughput.add_column("Forward passes", justify="right")
+    throughput.add_column("Speedup", justify="right")
+    for concurrency in CONCURRENCY:
+        baseline, passes = concurrent_throughput(reranker, pair_sets, concurrency, repeats)
+        throughput.add_row(str(concurrency), "off", f"{baseline:.1f}", str(passes), "1.00x")
+        service = RerankService(reranker)
+        try:
+            qps, passes = concurrent_throughput(reranker, pair_sets, concurrency, repeats)
+        finally:
+            service.close()
+        throughput.add_row(str(concurrency), "on", f"{qps:.1f}", str(passes), f"{qps / baseline:.2f}x")
+    console.print(throughput)
+
+
+if __name__ == "__main__":
+    main()
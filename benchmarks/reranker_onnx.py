@@ -0,0 +1,131 @@
+"""
+Parity check and per-query latency of the reranker backends: PyTorch
+CrossEncoder vs the exported ONNX model (fp32 and dynamically int8
+quantized).
+
+Each query reranks CANDIDATES passages, as RAGPipeline does
+(rerank_top_k * 3). Passages are chunks of data/raw, so no Qdrant or
+Ollama is needed. fp32 ONNX must match PyTorch to within ATOL; int8 is
+reported (score drift and top-k agreement), not asserted. The same
+parity checks run under pytest in tests/test_onnx_parity.py.
+
+Needs sentence-transformers and an exported model directory:
+    python -m src.retrieval.onnx_cross_encoder
+
+Usage:
+    python benchmarks/reranker_onnx.py [repeats]
+"""
+
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from src.config import settings
+from src.ingestion.chunker import MarkdownChunker
+from src.retrieval.onnx_cross_encoder import INT8_FILE, OnnxCrossEncoder
+
+QUERIES = [
+    "What careers suit Life Path 7?",
+    "Dragon compatibility with Rat",
+    "lucky colors for the Year of the Dog",
+    "master number 11 spiritual meaning",
+    "which zodiac signs are compatible with the Ox",
+    "life path 3 relationships and love",
+    "fire element personality traits",
+    "What are the weaknesses of the Snake?",
+]
+CANDIDATES = settings.rerank_top_k * 3
+ATOL = 1e-3
+
+
+def candidate_sets(seed: int = 7) -> list[list[tuple[str, str]]]:
+    """CANDIDATES (query, passage) pairs per query, sampled from the corpus."""
+    rng = random.Random(seed)
+    chunker = MarkdownChunker(chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap)
+    passages = [c.content for c in chunker.chunk_directory(settings.data_raw_dir)]
+    return [[(q, p) for p in rng.sample(passages, CANDIDATES)] for q in QUERIES]
+
+
+def per_query_ms(model, pair_sets: list, repeats: int) -> float:
+    """Median latency of one query's rerank (one predict call)."""
+    model.predict(pair_sets[0])  # warm-up
+    times = []
+    for _ in range(repeats):
+        for pairs in pair_sets:
+            start = time.perf_counter()
+            model.predict(pairs)
+            times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def top_k_agreement(reference: list[np.ndarray], scores: list[np.ndarray], k: int) -> float:
+    """Mean overlap of the top-k passages picked by two scorers."""
+    overlaps = [
+        len(set(np.argsort(-a)[:k]) & set(np.argsort(-b)[:k])) / k
+        for a, b in zip(reference, scores)
+    ]
+    return sum(overlaps) / len(overlaps)
+
+
+def main():
+    from sentence_transformers import CrossEncoder
+
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    console = Console()
+    pair_sets = candidate_sets()
+    k = settings.rerank_top_k
+
+    backends = {
+        "torch fp32": CrossEncoder(settings.reranker_model),
+        "onnx fp32": OnnxCrossEncoder(settings.reranker_onnx_dir, threads=settings.reranker_threads),
+    }
+    if (settings.reranker_onnx_dir / INT8_FILE).exists():
+        backends["onnx int8"] = OnnxCrossEncoder(
+            settings.reranker_onnx_dir, int8=True, threads=settings.reranker_threads,
+        )
+
+    scores = {
+        name: [np.asarray(model.predict(pairs), dtype=np.float32) for pairs in pair_sets]
+        for name, model in backends.items()
+    }
+    reference = scores["torch fp32"]
+
+    drift = max(
+        float(np.abs(a - b).max()) for a, b in zip(reference, scores["onnx fp32"])
+    )
+    assert drift <= ATOL, f"onnx fp32 scores differ from torch by {drift:.2e} (> {ATOL})"
+
+    table = Table(title=f"Reranking {CANDIDATES} candidates per query, {len(QUERIES)} queries x {repeats}")
+    table.add_column("Backend")
+    table.add_column("ms/query", justify="right")
+    table.add_column("Speedup", justify="right")
+    table.add_column("Max |score diff|", justify="right")
+    table.add_column(f"Top-{k} agreement", justify="right")
+
+    baseline = None
+    for name, model in backends.items():
+        ms = per_query_ms(model, pair_sets, repeats)
+        baseline = baseline or ms
+        diff = max(float(np.abs(a - b).max()) for a, b in zip(reference, scores[name]))
+        table.add_row(
+            name,
+            f"{ms:.1f}",
+            f"{baseline / ms:.2f}x",
+            f"{diff:.2e}",
+            f"{top_k_agreement(reference, scores[name], k):.3f}",
+        )
+
+    console.print(table)
+    console.print(f"[green]onnx fp32 parity OK (max diff {drift:.2e} <= {ATOL})[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """Agentic RAG - Multi-step reasoning."""
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 from enum import Enum
 import re
 
@@ -16,6 +16,8 @@ class AgentDecision:
     reasoning: str
     search_queries: List[str] = None
     clarifying_question: str = None
+    # Retrieval filter per search query (None = search everything)
+    search_filters: List[Optional[dict]] = None
 
 class RAGAgent:
     def __init__(self, pipeline):
@@ -27,8 +29,11 @@ class RAGAgent:
             return AgentDecision(action=AgentAction.CLARIFY, reasoning="Query is too vague", clarifying_question=self._generate_clarification(query_lower))
         if self._needs_multi_search(query_lower):
             queries = self._decompose_query(query_lower)
-            return AgentDecision(action=AgentAction.MULTI_SEARCH, reasoning="Query requires multiple topics", search_queries=queries)
-        return AgentDecision(action=AgentAction.SEARCH, reasoning="Standard single search", search_queries=[query])
+            topics = self._extract_topics(query_lower)
+            filters = [self._source_filter(t) for t in topics] if len(queries) == len(topics) else [None] * len(queries)
+            return AgentDecision(action=AgentAction.MULTI_SEARCH, reasoning="Query requires multiple topics", search_queries=queries, search_filters=filters)
+        filters = self._category_filter(self._extract_topics(query_lower))
+        return AgentDecision(action=AgentAction.SEARCH, reasoning="Standard single search", search_queries=[query], search_filters=[filters])
     
     def _is_too_vague(self, query: str) -> bool:
         vague = ["help", "hi", "hello", "hey", "?"]
@@ -53,13 +58,30 @@ class RAGAgent:
         found = []
         zodiac = ["rat", "ox", "tiger", "rabbit", "dragon", "snake", "horse", "goat", "monkey", "rooster", "dog", "pig"]
         for sign in zodiac:
-            if sign in query:
+            if re.search(rf"\b{sign}s?\b", query):
                 found.append(sign.capitalize())
         life_paths = re.findall(r"life path (\d+)", query)
         for lp in life_paths:
             found.append(f"Life Path {lp}")
         return found
     
+    def _source_filter(self, topic: str) -> dict:
+        """Retrieval filter on the source file(s) covering a topic."""
+        match = re.fullmatch(r"Life Path (\d+)", topic)
+        if match:
+            number = match.group(1)
+            if number in ("11", "22", "33"):
+                return {"source_file": [f"life_path_{number}", f"master_number_{number}"]}
+            return {"source_file": [f"life_path_{number}"]}
+        return {"source_file": [topic.lower()]}
+    
+    def _category_filter(self, topics: List[str]) -> Optional[dict]:
+        """Retrieval filter on the category all topics belong to, if they share one."""
+        categories = {"numerology" if t.startswith("Life Path") else "chinese_zodiac" for t in topics}
+        if len(categories) == 1:
+            return {"category": list(categories)}
+        return None
+    
     def _generate_clarification(self, query: str) -> str:
         if "compatible" in query:
             return "Which two zodiac signs would you like me to check compatibility for?"
@@ -75,9 +97,9 @@ class RAGAgent:
         if decision.action == AgentAction.CLARIFY:
             return {"response": decision.clarifying_question, "action_taken": "clarify", "reasoning": decision.reasoning, "is_clarification": True}
         if decision.action == AgentAction.MULTI_SEARCH:
-            for sub_query in decision.search_queries[:3]:
-                self.pipeline.query(sub_query, top_k=3, use_memory=False)
+            # All sub-queries in one embedding call and one vector search request
+            sub_results = self.pipeline.retriever.search_batch(decision.search_queries[:3], top_k=3, filters=decision.search_filters[:3])
             final = self.pipeline.query(query, use_memory=use_memory)
-            return {"response": final.answer, "action_taken": "multi_search", "reasoning": decision.reasoning, "sub_queries": decision.search_queries, "sources": [s.citation for s in final.sources], "is_clarification": False}
-        response = self.pipeline.query(query, use_memory=use_memory)
+            return {"response": final.answer, "action_taken": "multi_search", "reasoning": decision.reasoning, "sub_queries": decision.search_queries, "sub_sources": [[c.citation for c in chunks] for chunks in sub_results], "sources": [s.citation for s in final.sources], "is_clarification": False}
+        response = self.pipeline.query(query, use_memory=use_memory, filters=decision.search_filters[0])
         return {"response": response.answer, "action_taken": "search", "reasoning": decision.reasoning, "sources": [s.citation for s in response.sources], "rewritten_query": response.rewritten_query, "is_clarification": False}
@@ -1,12 +1,18 @@
 """FastAPI with health checks."""
 
+import time
+from typing import Optional
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import ollama
 from qdrant_client import QdrantClient
 
+from src.config import settings
+from src.ingestion.chunk_store import validate_filters
 from src.rag_pipeline import RAGPipeline
 from src.generation.generator import check_llm_available
+from src.retrieval.async_retriever import AsyncHybridRetriever
+from src.retrieval.cache import get_query_embedding_cache, get_rerank_cache
 
 app = FastAPI(title="Mystic RAG API", version="2.0")
 
@@ -14,6 +20,7 @@ class QueryRequest(BaseModel):
     question: str
     top_k: int = 5
     use_memory: bool = False
+    filters: Optional[dict[str, list[str]]] = None
 
 class QueryResponse(BaseModel):
     answer: str
@@ -22,18 +29,41 @@ class QueryResponse(BaseModel):
     latency_ms: float
     cost_usd: float
 
+class RetrieveRequest(BaseModel):
+    query: str
+    top_k: int = 10
+    filters: Optional[dict[str, list[str]]] = None
+
+class RetrievedSource(BaseModel):
+    text: str
+    citation: str
+    score: float
+
+class RetrieveResponse(BaseModel):
+    results: list[RetrievedSource]
+    latency_ms: float
+
 pipeline = None
+retriever = None
 
 @app.on_event("startup")
 def startup():
-    global pipeline
+    global pipeline, retriever
     pipeline = RAGPipeline(use_reranker=True, llm_backend="ollama")
+    retriever = AsyncHybridRetriever()
+
+@app.on_event("shutdown")
+async def shutdown():
+    if retriever is not None:
+        await retriever.aclose()
+    if pipeline is not None and pipeline.rerank_service is not None:
+        pipeline.rerank_service.close()
 
 @app.get("/health")
 def health_check():
     status = {"status": "healthy", "components": {}}
     try:
-        client = QdrantClient(host="qdrant", port=6333)
+        client = QdrantClient(host=settings.qdrant_host, port=settings.qdrant_port)
         client.get_collections()
         status["components"]["qdrant"] = "ok"
     except Exception as e:
@@ -51,6 +81,13 @@ def health_check():
         status["components"]["claude_fallback"] = "not configured"
     return status
 
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "query_embeddings": get_query_embedding_cache().get_stats(),
+        "rerank_scores": get_rerank_cache().get_stats(),
+    }
+
 @app.get("/health/quick")
 def quick_health():
     return {"status": "ok"}
@@ -60,7 +97,11 @@ def query(request: QueryRequest):
     if pipeline is None:
         raise HTTPException(status_code=503, detail="Pipeline not ready")
     try:
-        response = pipeline.query(request.question, top_k=request.top_k, use_memory=request.use_memory)
+        validate_filters(request.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        response = pipeline.query(request.question, top_k=request.top_k, use_memory=request.use_memory, filters=request.filters)
         return QueryResponse(
             answer=response.answer,
             sources=[s.citation for s in response.sources],
@@ -71,6 +112,21 @@ def query(request: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/retrieve", response_model=RetrieveResponse)
+async def retrieve(request: RetrieveRequest):
+    """Retrieval only, served on the event loop with pooled connections."""
+    if retriever is None:
+        raise HTTPException(status_code=503, detail="Retriever not ready")
+    start = time.perf_counter()
+    try:
+        chunks = await retriever.search(request.query, top_k=request.top_k, filters=request.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RetrieveResponse(
+        results=[RetrievedSource(text=c.text, citation=c.citation, score=c.score) for c in chunks],
+        latency_ms=(time.perf_counter() - start) * 1000,
+    )
+
 @app.get("/")
 def root():
     return {"message": "Mystic RAG API v2.0"}
@@ -15,25 +15,83 @@ class Settings(BaseSettings):
     project_root: Path = PROJECT_ROOT
     data_raw_dir: Path = PROJECT_ROOT / "data" / "raw"
     data_processed_dir: Path = PROJECT_ROOT / "data" / "processed"
+    chunk_store_dir: Path = PROJECT_ROOT / "data" / "processed" / "chunk_store"
+    bm25_index_dir: Path = PROJECT_ROOT / "data" / "processed" / "bm25"
+    ann_index_dir: Path = PROJECT_ROOT / "data" / "processed" / "ivf"
     
     # Ollama Configuration
     ollama_host: str = "http://localhost:11434"
     ollama_model: str = "llama3.2"
     embedding_model: str = "nomic-embed-text"  # Changed from bge-m3
+    embedding_batch_size: int = 32  # Texts per /api/embed request
+    embedding_concurrency: int = 4  # Parallel embedding requests during ingestion
+    embedding_max_retries: int = 3
+    embedding_cache_enabled: bool = True  # Reuse embeddings of unchanged chunks
+    embedding_cache_dir: Path = PROJECT_ROOT / "data" / "cache" / "embeddings"
+    embedding_cache_max_mb: int = 1024
+    
+    # HTTP connection pools (async retrieval: Qdrant and Ollama clients)
+    http_max_connections: int = 100
+    http_max_keepalive: int = 20
+    http_keepalive_expiry: float = 30.0  # Seconds an idle connection stays open
+    
+    # Ingestion Pipeline
+    ingest_batch_size: int = 256  # Chunks per streaming batch
+    ingest_queue_size: int = 4  # Batches buffered between pipeline stages
     
     # Qdrant Configuration
     qdrant_host: str = "localhost"
     qdrant_port: int = 6333
     qdrant_collection: str = "mystic_rag"
+    qdrant_quantization: str = "none"  # "none", "int8" (4x smaller) or "binary" (32x smaller)
+    qdrant_oversampling: float = 2.0  # Quantized candidates per result, rescored with float vectors
+    qdrant_vectors_on_disk: bool = False  # Keep float originals on disk (pair with quantization)
     
     # Chunking Configuration
     chunk_size: int = 512
     chunk_overlap: int = 50
+    chunk_workers: int = 1  # >1 chunks files on a pool of spawned processes
+    chunk_unit: str = "chars"  # "chars" or "tokens" (token budget + section packing)
+    chunk_token_budget: int = 256
+    chunk_token_overlap: int = 32
+    chunk_tokenizer: str = "approx"  # "approx" or a Hugging Face tokenizer name
     
     # Retrieval Configuration
+    vector_backend: str = "qdrant"  # "qdrant", "local" (exact, in-process) or "ivf" (ANN, in-process)
+    ann_nlist: int = 0  # IVF lists; 0 = ~4 * sqrt(N)
+    ann_nprobe: int = 0  # IVF lists scanned per query (recall/latency, like hnsw_ef); 0 = calibrate at build
+    ann_target_recall: float = 0.95  # recall@10 a calibrated nprobe must reach on a sample of the corpus
     top_k: int = 10
     rerank_top_k: int = 5
-    hybrid_alpha: float = 0.7
+    retrieval_mode: str = "hybrid"  # "hybrid" (BM25 + dense) or "dense"
+    hybrid_fusion: str = "alpha"  # "alpha" (weighted scores) or "rrf" (reciprocal rank)
+    hybrid_alpha: float = 0.7  # Dense weight in alpha fusion; BM25 gets 1 - alpha
+    hybrid_candidates: int = 30  # Hits fetched from each leg before fusion
+    rrf_k: int = 60
+    query_embedding_cache_size: int = 1024  # Query embeddings kept in the in-memory LRU (0 disables)
+    
+    # Reranker
+    reranker_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_backend: str = "torch"  # "torch" (sentence-transformers) or "onnx" (ONNX Runtime, CPU)
+    reranker_onnx_dir: Path = PROJECT_ROOT / "models" / "reranker-onnx"  # Written by src/retrieval/onnx_cross_encoder.py
+    reranker_onnx_int8: bool = False  # Use the dynamically int8 quantized ONNX model
+    reranker_threads: int = 0  # ONNX Runtime intra-op threads; 0 = one per core
+    reranker_batch_size: int = 16  # Max pairs per inference batch (batches are length-bucketed)
+    reranker_max_tokens: int = 512  # Pair truncation budget in tokens
+    rerank_cache_size: int = 10000  # (query, chunk) scores kept in the in-memory LRU (0 disables)
+    rerank_cache_ttl: int = 3600  # Seconds before a cached score expires (0 = never)
+    rerank_cascade: bool = False  # Prune hopeless candidates by retrieval score before the cross-encoder
+    rerank_cascade_gap: float = 0.3  # Drop candidates this far below the top_k-th (min-max normalized) retrieval score
+    rerank_max_pairs: int = 0  # Cap on cross-encoder pairs per query; 0 = no cap
+    rerank_batching: bool = False  # Score concurrent queries' pairs together (src/retrieval/rerank_service.py)
+    rerank_batch_wait_ms: float = 5.0  # Longest a request waits for others to join its batch
+    rerank_batch_max_pairs: int = 128  # Run the batch as soon as this many pairs are waiting; also its forward-pass size (overrides reranker_batch_size)
+    
+    # Small-to-big retrieval: index small child chunks, return their parent section
+    small_to_big: bool = False
+    child_chunk_size: int = 200  # Chars per indexed child chunk (replaces chunk_size when enabled)
+    child_chunk_overlap: int = 20
+    parent_max_chars: int = 2000  # Upper bound on an expanded parent passage
     
     # API Configuration
     api_host: str = "0.0.0.0"
@@ -3,23 +3,39 @@ Ingestion pipeline for Mystic RAG.
 
 Components:
 - chunker: Markdown-aware document chunking
+- chunk_store: Memory-mapped columnar store of ingested chunks
+- tokenizer: Token length functions for token-budget chunking
 - embedder: Ollama-based embedding generation
+- embedding_cache: Content-addressed on-disk embedding cache
 - indexer: Qdrant vector storage
+- manifest: File fingerprints for incremental ingestion
 """
 
 from src.ingestion.chunker import Chunk, MarkdownChunker, chunk_documents
+from src.ingestion.chunk_store import ChunkStore, ChunkStoreWriter, open_chunk_store
+from src.ingestion.tokenizer import TokenCounter, approx_token_count, get_token_counter
 from src.ingestion.embedder import OllamaEmbedder, embed_chunks, check_ollama_available
+from src.ingestion.embedding_cache import EmbeddingCache
 from src.ingestion.indexer import QdrantIndexer, check_qdrant_available
+from src.ingestion.manifest import IngestionManifest
 from src.ingestion.main import run_ingestion
 
 __all__ = [
     "Chunk",
     "MarkdownChunker",
     "chunk_documents",
+    "ChunkStore",
+    "ChunkStoreWriter",
+    "open_chunk_store",
+    "TokenCounter",
+    "approx_token_count",
+    "get_token_counter",
     "OllamaEmbedder",
     "embed_chunks",
     "check_ollama_available",
+    "EmbeddingCache",
     "QdrantIndexer",
     "check_qdrant_available",
+    "IngestionManifest",
     "run_ingestion",
 ]
@@ -0,0 +1,356 @@
+"""
+Binary columnar chunk store.
+
+Replaces the indented chunks.json with a compact, memory-mappable layout:
+- text.bin: every chunk's content as one contiguous UTF-8 blob
+- offsets.npy: uint64 byte offsets into text.bin (n + 1 entries)
+- <column>.npy: one array per metadata field; strings are dictionary
+  encoded as uint32 codes into the vocabularies in meta.json
+- content_hash.npy: raw sha256 digests, one uint8[32] row per chunk
+- vectors.f32 (optional): L2-normalized float32 embeddings, one row per
+  chunk, for the in-process vector backend (src/retrieval/vector_store.py)
+
+Row i is chunk id i. Readers memory-map every file, so opening the store
+is O(1) and fetching a chunk touches only its own bytes.
+
+Every write stamps meta.json with a fresh build_id. Indexes derived from
+the store (BM25, IVF) record the build_id they were built from, so a
+stale index is detected even when the row count happens to match.
+"""
+
+import json
+import mmap
+import os
+import shutil
+import uuid
+from array import array
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from src.ingestion.chunker import Chunk
+
+FORMAT_VERSION = 2
+# Version 1 stores predate the category column; they read as category ""
+_READABLE_VERSIONS = (1, 2)
+
+# (column name, array typecode, numpy dtype)
+_INT_COLUMNS = [
+    ("source_file", "I", np.uint32),
+    ("category", "I", np.uint32),
+    ("headers", "I", np.uint32),
+    ("chunk_index", "i", np.int32),
+    ("total_chunks", "i", np.int32),
+]
+_VOCAB_COLUMNS = ("source_file", "category", "headers")
+# Metadata fields that can be used as retrieval filters
+FILTER_COLUMNS = ("source_file", "category")
+
+
+def validate_filters(filters: Optional[dict]) -> None:
+    """Raise ValueError if a retrieval filter names a field outside FILTER_COLUMNS."""
+    for column in filters or {}:
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot filter on {column!r}, expected one of {FILTER_COLUMNS}")
+
+
+class ChunkStoreWriter:
+    """
+    Append-only writer; rows are streamed to disk as they arrive.
+
+    Files are written to a temporary directory and swapped into place on
+    close(), so readers never see a half-written store.
+    """
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        self._tmp_dir = self.store_dir.with_name(self.store_dir.name + ".tmp")
+        if self._tmp_dir.exists():
+            shutil.rmtree(self._tmp_dir)
+        self._tmp_dir.mkdir(parents=True)
+
+        self._text = open(self._tmp_dir / "text.bin", "wb")
+        self._offsets = array("Q", [0])
+        self._columns = {name: array(typecode) for name, typecode, _ in _INT_COLUMNS}
+        self._hashes = bytearray()
+        self._vectors = None
+        self._vector_dim = None
+        self._vocab: dict[str, dict] = {name: {} for name in _VOCAB_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _code(self, column: str, value) -> int:
+        key = json.dumps(value) if isinstance(value, list) else value
+        vocab = self._vocab[column]
+        if key not in vocab:
+            vocab[key] = len(vocab)
+        return vocab[key]
+
+    def add(
+        self,
+        content: str,
+        source_file: str,
+        headers: list[str],
+        chunk_index: int,
+        total_chunks: int,
+        content_hash: bytes,
+        embedding=None,
+        category: str = "",
+    ) -> int:
+        """Append one row and return its chunk id."""
+        if embedding is not None:
+            self._write_vector(embedding)
+        elif self._vectors is not None:
+            raise ValueError("Either every row of a chunk store has an embedding or none does")
+
+        encoded = content.encode("utf-8")
+        self._text.write(encoded)
+        self._offsets.append(self._offsets[-1] + len(encoded))
+        self._columns["source_file"].append(self._code("source_file", source_file))
+        self._columns["category"].append(self._code("category", category))
+        self._columns["headers"].append(self._code("headers", headers))
+        self._columns["chunk_index"].append(chunk_index)
+        self._columns["total_chunks"].append(total_chunks)
+        self._hashes += content_hash
+        return len(self) - 1
+
+    def _write_vector(self, embedding) -> None:
+        vector = np.asarray(embedding, dtype=np.float32)
+        if self._vectors is None:
+            if len(self):
+                raise ValueError("Either every row of a chunk store has an embedding or none does")
+            self._vectors = open(self._tmp_dir / "vectors.f32", "wb")
+            self._vector_dim = len(vector)
+        elif len(vector) != self._vector_dim:
+            raise ValueError(f"Embedding dim {len(vector)} != chunk store dim {self._vector_dim}")
+        norm = np.linalg.norm(vector)
+        self._vectors.write((vector / norm if norm else vector).tobytes())
+
+    def add_chunks(self, chunks: list[Chunk], embeddings: list = None) -> None:
+        """Append chunks, optionally with their embeddings (same order)."""
+        for i, chunk in enumerate(chunks):
+            self.add(
+                content=chunk.content,
+                source_file=chunk.source_file,
+                headers=chunk.headers,
+                chunk_index=chunk.chunk_index,
+                total_chunks=chunk.total_chunks,
+                content_hash=bytes.fromhex(chunk.content_hash),
+                embedding=embeddings[i] if embeddings is not None else None,
+                category=chunk.category,
+            )
+
+    def copy_from(
+        self,
+        store: "ChunkStore",
+        exclude_sources: set[tuple[str, str]] = frozenset(),
+        with_vectors: bool = True,
+    ) -> int:
+        """
+        Copy every row of another store except those of exclude_sources
+        ((category, source_file) keys). Rows without a category (version 1
+        stores) can't tell same-named files apart and are excluded by
+        source_file alone.
+        """
+        copy_vectors = with_vectors and store.vectors is not None
+        excluded_files = {source_file for _, source_file in exclude_sources}
+        copied = 0
+        for i in range(len(store)):
+            category, source_file = store.source_key(i)
+            if (category, source_file) in exclude_sources or (not category and source_file in excluded_files):
+                continue
+            self.add(
+                content=store.text(i),
+                source_file=store.source_file(i),
+                headers=store.headers(i),
+                chunk_index=int(store.columns["chunk_index"][i]),
+                total_chunks=int(store.columns["total_chunks"][i]),
+                content_hash=store.content_hashes[i].tobytes(),
+                embedding=store.vectors[i] if copy_vectors else None,
+                category=store.category(i),
+            )
+            copied += 1
+        return copied
+
+    def close(self) -> Path:
+        """Finish writing and atomically replace the store directory."""
+        self._text.close()
+        if self._vectors is not None:
+            self._vectors.close()
+        np.save(self._tmp_dir / "offsets.npy", np.frombuffer(self._offsets, dtype=np.uint64))
+        for name, _, dtype in _INT_COLUMNS:
+            np.save(self._tmp_dir / f"{name}.npy", np.frombuffer(self._columns[name], dtype=dtype))
+        np.save(
+            self._tmp_dir / "content_hash.npy",
+            np.frombuffer(self._hashes, dtype=np.uint8).reshape(-1, 32),
+        )
+        (self._tmp_dir / "meta.json").write_text(json.dumps({
+            "version": FORMAT_VERSION,
+            "build_id": uuid.uuid4().hex,
+            "count": len(self),
+            "vector_dim": self._vector_dim,
+            "vocab": {
+                name: list(self._vocab[name]) for name in _VOCAB_COLUMNS
+            },
+        }))
+
+        old_dir = self.store_dir.with_name(self.store_dir.name + ".old")
+        if self.store_dir.exists():
+            os.replace(self.store_dir, old_dir)
+        os.replace(self._tmp_dir, self.store_dir)
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+        return self.store_dir
+
+    def abort(self) -> None:
+        """Discard everything written so far."""
+        self._text.close()
+        if self._vectors is not None:
+            self._vectors.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+class ChunkStore:
+    """Read-only, memory-mapped view of a chunk store."""
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        meta = json.loads((self.store_dir / "meta.json").read_text())
+        if meta.get("version") not in _READABLE_VERSIONS:
+            raise ValueError(f"Unsupported chunk store version: {meta.get('version')}")
+
+        self.version = meta["version"]
+        self.count = meta["count"]
+        # None for stores written before build ids
+        self.build_id = meta.get("build_id")
+        self.source_file_vocab = meta["vocab"]["source_file"]
+        self.category_vocab = meta["vocab"].get("category", [""])
+        self.headers_vocab = [json.loads(h) for h in meta["vocab"]["headers"]]
+
+        self.offsets = np.load(self.store_dir / "offsets.npy", mmap_mode="r")
+        self.columns = {}
+        for name, _, dtype in _INT_COLUMNS:
+            path = self.store_dir / f"{name}.npy"
+            if path.exists():
+                self.columns[name] = np.load(path, mmap_mode="r")
+            else:
+                self.columns[name] = np.zeros(self.count, dtype=dtype)
+        self.content_hashes = np.load(self.store_dir / "content_hash.npy", mmap_mode="r")
+
+        self.vectors = None
+        self.vector_dim = meta.get("vector_dim")
+        if self.vector_dim and self.count:
+            self.vectors = np.memmap(
+                self.store_dir / "vectors.f32", dtype=np.float32, mode="r",
+                shape=(self.count, self.vector_dim),
+            )
+
+        text_file = self.store_dir / "text.bin"
+        if text_file.stat().st_size:
+            with open(text_file, "rb") as f:
+                self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._text = b""
+
+    def __len__(self) -> int:
+        return self.count
+
+    def raw(self, i: int) -> memoryview:
+        """Zero-copy UTF-8 bytes of chunk i."""
+        return memoryview(self._text)[int(self.offsets[i]):int(self.offsets[i + 1])]
+
+    def text(self, i: int) -> str:
+        return self._text[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8")
+
+    def source_file(self, i: int) -> str:
+        return self.source_file_vocab[self.columns["source_file"][i]]
+
+    def category(self, i: int) -> str:
+        return self.category_vocab[self.columns["category"][i]]
+
+    def source_key(self, i: int) -> tuple[str, str]:
+        return self.category(i), self.source_file(i)
+
+    def headers(self, i: int) -> list[str]:
+        return self.headers_vocab[self.columns["headers"][i]]
+
+    def content_hash(self, i: int) -> str:
+        return self.content_hashes[i].tobytes().hex()
+
+    def __getitem__(self, i: int) -> Chunk:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return Chunk(
+            content=self.text(i),
+            source_file=self.source_file(i),
+            headers=list(self.headers(i)),
+            chunk_index=int(self.columns["chunk_index"][i]),
+            total_chunks=int(self.columns["total_chunks"][i]),
+            category=self.category(i),
+        )
+
+    def __iter__(self) -> Iterator[Chunk]:
+        for i in range(self.count):
+            yield self[i]
+
+    def iter_texts(self) -> Iterator[str]:
+        for i in range(self.count):
+            yield self.text(i)
+
+    def rows_for(self, column: str, values: list[str]) -> np.ndarray:
+        """Chunk ids of all rows whose `column` value is in values."""
+        vocab = self.source_file_vocab if column == "source_file" else self.category_vocab
+        values = set(values)
+        codes = [code for code, name in enumerate(vocab) if name in values]
+        return np.flatnonzero(np.isin(self.columns[column], codes))
+
+    def rows_for_sources(self, source_files: list[str]) -> np.ndarray:
+        """Chunk ids of all rows whose source_file is in source_files."""
+        return self.rows_for("source_file", source_files)
+
+    def rows_matching(self, filters: dict) -> np.ndarray:
+        """
+        Chunk ids matching every field of a retrieval filter, in order.
+
+        filters maps a field of FILTER_COLUMNS to one value or a list of
+        accepted values, e.g. {"source_file": ["dragon", "tiger"]}.
+        """
+        validate_filters(filters)
+        rows = np.arange(self.count)
+        for column, values in filters.items():
+            if isinstance(values, str):
+                values = [values]
+            rows = np.intersect1d(rows, self.rows_for(column, values), assume_unique=True)
+        return rows
+
+
+def open_chunk_store(store_dir: Path = None) -> Optional[ChunkStore]:
+    """Open the ingested chunk store, or return None if it doesn't exist."""
+    if store_dir is None:
+        from src.config import settings
+        store_dir = settings.chunk_store_dir
+    if not (Path(store_dir) / "meta.json").exists():
+        return None
+    return ChunkStore(store_dir)
+
+
+if __name__ == "__main__":
+    import sys
+
+    store = open_chunk_store()
+    if store is None:
+        print("No chunk store found. Run: make ingest")
+        sys.exit(1)
+
+    print(f"Chunk store: {store.store_dir}")
+    print(f"  Chunks: {len(store)}")
+    print(f"  Source files: {len(store.source_file_vocab)}")
+    print(f"  Categories: {', '.join(c for c in store.category_vocab if c) or 'none'}")
+    print(f"  Text bytes: {int(store.offsets[-1])}")
+    print(f"  Vectors: {store.vector_dim or 'none'}")
+
+    for arg in sys.argv[1:]:
+        chunk = store[int(arg)]
+        print(f"\n[{arg}] {chunk.citation}\n{chunk.content}")
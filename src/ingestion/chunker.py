@@ -5,12 +5,32 @@ Strategy:
 1. Split by markdown headers first (natural semantic boundaries)
 2. If sections are too long, use recursive splitting with overlap
 3. Preserve metadata (source file, header hierarchy) for citations
+
+Sizes are measured in characters by default. With a token length function
+(see src/ingestion/tokenizer.py), chunk_size becomes a token budget and
+small neighbouring sections are packed together up to that budget.
 """
 
+import hashlib
+import multiprocessing
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, count, islice
+from operator import add
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Generator
+from typing import Callable, Generator, Iterable
+
+
+def file_source_key(file_path: Path) -> tuple[str, str]:
+    """
+    (category, source_file) of a markdown file, as chunk_file assigns them.
+    
+    The stem alone isn't unique: chinese_zodiac/fire.md and
+    numerology/fire.md would share source_file "fire".
+    """
+    return file_path.parent.name, file_path.stem
 
 
 @dataclass
@@ -22,15 +42,28 @@ class Chunk:
     headers: list[str] = field(default_factory=list)
     chunk_index: int = 0
     total_chunks: int = 0
+    category: str = ""
+    
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the chunk content, used for stable IDs and caching."""
+        return hashlib.sha256(self.content.encode("utf-8")).hexdigest()
+    
+    @property
+    def source_key(self) -> tuple[str, str]:
+        """(category, source_file): identifies the file this chunk came from."""
+        return self.category, self.source_file
     
     @property
     def metadata(self) -> dict:
         """Return metadata dict for vector DB storage."""
         return {
             "source_file": self.source_file,
+            "category": self.category,
             "headers": " > ".join(self.headers) if self.headers else "",
             "chunk_index": self.chunk_index,
             "total_chunks": self.total_chunks,
+            "content_hash": self.content_hash,
         }
     
     @property
@@ -52,6 +85,10 @@ class MarkdownChunker:
     - Headers provide natural semantic boundaries
     - Recursive splitting handles long sections
     - Overlap prevents losing context at boundaries
+    
+    chunk_size and chunk_overlap are in units of length_function: characters
+    by default, tokens when given a token counter. pack_sections merges
+    consecutive small sections under a shared header while they fit.
     """
     
     def __init__(
@@ -59,10 +96,14 @@ class MarkdownChunker:
         chunk_size: int = 512,
         chunk_overlap: int = 50,
         min_chunk_size: int = 100,
+        length_function: Callable[[str], int] = len,
+        pack_sections: bool = False,
     ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.min_chunk_size = min_chunk_size
+        self.length_function = length_function
+        self.pack_sections = pack_sections
         
         # Regex patterns for markdown headers
         self.header_pattern = re.compile(r'^(#{1,6})\s+(.+)$', re.MULTILINE)
@@ -70,13 +111,16 @@ class MarkdownChunker:
     def chunk_file(self, file_path: Path) -> list[Chunk]:
         """Chunk a single markdown file."""
         content = file_path.read_text(encoding="utf-8")
-        source_name = file_path.stem  # filename without extension
+        # Filename without extension, parent folder (e.g. chinese_zodiac, numerology)
+        category, source_name = file_source_key(file_path)
         
-        return self.chunk_text(content, source_name)
+        return self.chunk_text(content, source_name, category=category)
     
-    def chunk_text(self, text: str, source_name: str) -> list[Chunk]:
+    def chunk_text(self, text: str, source_name: str, category: str = "") -> list[Chunk]:
         """Chunk markdown text into semantic sections."""
         sections = self._split_by_headers(text)
+        if self.pack_sections:
+            sections = self._pack_sections(sections)
         chunks = []
         
         for section_headers, section_content in sections:
@@ -85,11 +129,12 @@ class MarkdownChunker:
                 continue
             
             # If section fits in one chunk, use it directly
-            if len(section_content) <= self.chunk_size:
+            if self.length_function(section_content) <= self.chunk_size:
                 chunks.append(Chunk(
                     content=section_content.strip(),
                     source_file=source_name,
                     headers=section_headers,
+                    category=category,
                 ))
             else:
                 # Section too long, split recursively
@@ -100,6 +145,7 @@ class MarkdownChunker:
                             content=sub_content.strip(),
                             source_file=source_name,
                             headers=section_headers,
+                            category=category,
                         ))
         
         # Add index information
@@ -158,51 +204,58 @@ class MarkdownChunker:
         
         return sections
     
+    def _pack_sections(
+        self,
+        sections: list[tuple[list[str], str]],
+    ) -> list[tuple[list[str], str]]:
+        """
+        Merge consecutive sections while they fit in one chunk together.
+        
+        Merged sections keep the header path they share, so only sections
+        under a common parent header are packed.
+        """
+        packed = []
+        packed_lengths = []
+        
+        for headers, content in sections:
+            if not content.strip():
+                continue
+            length = self.length_function(content)
+            
+            if packed:
+                prev_headers, prev_content = packed[-1]
+                shared = _common_prefix(prev_headers, headers)
+                if shared and packed_lengths[-1] + length <= self.chunk_size:
+                    packed[-1] = (shared, prev_content.rstrip() + "\n\n" + content)
+                    packed_lengths[-1] += length
+                    continue
+            
+            packed.append((headers, content))
+            packed_lengths.append(length)
+        
+        return packed
+    
     def _recursive_split(self, text: str) -> list[str]:
         """
-        Recursively split text that's too long.
+        Split text that's too long.
         
-        Split hierarchy:
+        Split hierarchy (the first separator present in the text is used):
         1. Double newlines (paragraphs)
         2. Single newlines
         3. Sentences (. ! ?)
         4. Hard split at chunk_size
         """
-        if len(text) <= self.chunk_size:
+        if self.length_function(text) <= self.chunk_size:
             return [text]
         
-        chunks = []
-        
-        # Try splitting by paragraphs first
         separators = ['\n\n', '\n', '. ', '! ', '? ']
         
+        if self.length_function is not len:
+            return self._split_by_budget(text, separators)
+        
         for separator in separators:
             if separator in text:
-                parts = text.split(separator)
-                current_chunk = ""
-                
-                for part in parts:
-                    # Add separator back (except for paragraph breaks)
-                    part_with_sep = part + (separator if separator not in ['\n\n', '\n'] else '\n')
-                    
-                    if len(current_chunk) + len(part_with_sep) <= self.chunk_size:
-                        current_chunk += part_with_sep
-                    else:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                        
-                        # Handle overlap
-                        if self.chunk_overlap > 0 and current_chunk:
-                            overlap_text = current_chunk[-self.chunk_overlap:]
-                            current_chunk = overlap_text + part_with_sep
-                        else:
-                            current_chunk = part_with_sep
-                
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                
-                if chunks:
-                    return chunks
+                return self._split_on_separator(text, separator)
         
         # Hard split as last resort
         chunks = []
@@ -213,17 +266,181 @@ class MarkdownChunker:
         
         return chunks
     
-    def chunk_directory(self, dir_path: Path) -> Generator[Chunk, None, None]:
+    def _split_on_separator(self, text: str, separator: str) -> list[str]:
+        """
+        Greedily pack separator-delimited parts into chunks with overlap.
+        
+        The text is treated as a stream of parts, each terminated by a
+        joiner (the separator itself, or a single newline for paragraph
+        and line breaks). Every chunk is a window of that stream, so chunks
+        are tracked as (start, end) boundary offsets and sliced out exactly
+        once, instead of being grown by string concatenation and re-sliced
+        for overlap. Part end offsets come from one C-level pass, and the
+        packing loop only does integer arithmetic.
+        
+        Line and sentence splits slice the original text. Paragraph splits
+        still slice a normalised copy (breaks collapse to one newline) and
+        show no consistent speedup in benchmarks/chunker_split.py; the gain
+        is for the other two.
+        """
+        joiner = '\n' if separator in ('\n\n', '\n') else separator
+        size, overlap = self.chunk_size, self.chunk_overlap
+        
+        parts = text.split(separator)
+        part_ends = accumulate(map(len, parts))
+        part_ends = map(add, part_ends, count(len(joiner), len(joiner)))
+        
+        # Greedy windows over integer offsets only, backing up by
+        # chunk_overlap whenever the next part would overflow the window
+        # (kept as two int lists: no per-chunk tuples for the GC to track)
+        starts, ends = [], []
+        start = end = 0
+        for part_end in part_ends:
+            if part_end - start > size and end > start:
+                starts.append(start)
+                ends.append(end)
+                if overlap <= 0:
+                    start = end
+                elif end - overlap > start:
+                    start = end - overlap
+            end = part_end
+        
+        # The last window ends with a joiner that is not in the text
+        if joiner == separator:
+            # Offsets index the original text directly
+            stream = text
+            last = text[start:] + joiner
+        else:
+            # Paragraph breaks collapse to one newline: slice a normalised copy
+            stream = joiner.join(parts) + joiner
+            last = stream[start:end]
+        
+        chunks = [stream[a:b].strip() for a, b in zip(starts, ends)]
+        chunks.append(last.strip())
+        return chunks
+    
+    def _split_by_budget(self, text: str, separators: list[str]) -> list[str]:
+        """
+        Split by an arbitrary length function (e.g. a token budget).
+        
+        Parts are packed greedily up to chunk_size; overlap carries whole
+        trailing parts worth at most chunk_overlap. Token counts are not
+        additive at character granularity, so unlike the character path
+        windows never start mid-part. A part that alone exceeds the budget
+        is split again with the next separator, or hard-split last.
+        """
+        size, overlap = self.chunk_size, self.chunk_overlap
+        
+        for level, separator in enumerate(separators):
+            if separator in text:
+                break
+        else:
+            # Hard split, converting the budget to characters at this
+            # text's characters-per-unit ratio
+            ratio = len(text) / max(1, self.length_function(text))
+            step = max(1, int((size - overlap) * ratio))
+            width = max(1, int(size * ratio))
+            chunks = [text[i:i + width].strip() for i in range(0, len(text), step)]
+            return [c for c in chunks if c]
+        
+        joiner = '\n' if separator in ('\n\n', '\n') else separator
+        chunks = []
+        window, window_length = [], 0
+        
+        for part in text.split(separator):
+            part += joiner
+            length = self.length_function(part)
+            
+            if length > size:
+                # Oversized part: flush, then split it on its own
+                if window:
+                    chunks.append("".join(p for p, _ in window).strip())
+                    window, window_length = [], 0
+                chunks.extend(self._split_by_budget(part, separators[level + 1:]))
+                continue
+            
+            if window and window_length + length > size:
+                chunks.append("".join(p for p, _ in window).strip())
+                
+                # Carry trailing parts as overlap if they leave room
+                carried, carried_length = [], 0
+                for p, n in reversed(window):
+                    if carried_length + n > overlap:
+                        break
+                    carried.append((p, n))
+                    carried_length += n
+                if carried_length + length > size:
+                    carried, carried_length = [], 0
+                window, window_length = carried[::-1], carried_length
+            
+            window.append((part, length))
+            window_length += length
+        
+        if window:
+            chunks.append("".join(p for p, _ in window).strip())
+        
+        return [c for c in chunks if c]
+    
+    def chunk_files(
+        self,
+        file_paths: Iterable[Path],
+        workers: int = 1,
+        files_per_task: int = 16,
+    ) -> Generator[Chunk, None, None]:
+        """
+        Lazily chunk the given files.
+        
+        With workers > 1, groups of files_per_task files are chunked on a
+        process pool. Results are yielded in input order and at most
+        2 * workers groups are outstanding, so a slow consumer never lets
+        finished chunks pile up. Workers are spawned, not forked: ingestion
+        calls this from a pipeline thread while embedding threads may hold
+        locks a forked child would inherit held.
+        """
+        if workers <= 1:
+            for file_path in file_paths:
+                chunks = self.chunk_file(file_path)
+                yield from chunks
+            return
+        
+        file_paths = iter(file_paths)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending = deque()
+            while group := list(islice(file_paths, files_per_task)):
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+                pending.append(pool.submit(_chunk_file_group, self, group))
+            while pending:
+                yield from pending.popleft().result()
+    
+    def chunk_directory(self, dir_path: Path, workers: int = 1) -> Generator[Chunk, None, None]:
         """Chunk all markdown files in a directory (recursive)."""
-        for file_path in dir_path.rglob("*.md"):
-            chunks = self.chunk_file(file_path)
-            yield from chunks
+        yield from self.chunk_files(sorted(dir_path.rglob("*.md")), workers=workers)
+
+
+def _common_prefix(a: list[str], b: list[str]) -> list[str]:
+    """Longest shared leading run of two header paths."""
+    shared = []
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        shared.append(x)
+    return shared
+
+
+def _chunk_file_group(chunker: MarkdownChunker, file_paths: list[Path]) -> list[Chunk]:
+    """Process-pool task: chunk a group of files in order."""
+    chunks = []
+    for file_path in file_paths:
+        chunks.extend(chunker.chunk_file(file_path))
+    return chunks
 
 
 def chunk_documents(
     input_dir: Path,
     chunk_size: int = 512,
     chunk_overlap: int = 50,
+    workers: int = 1,
 ) -> list[Chunk]:
     """
     Convenience function to chunk all documents in a directory.
@@ -232,6 +449,7 @@ def chunk_documents(
         input_dir: Directory containing markdown files
         chunk_size: Target size for each chunk
         chunk_overlap: Overlap between chunks
+        workers: Number of chunking processes
         
     Returns:
         List of Chunk objects
@@ -241,7 +459,7 @@ def chunk_documents(
         chunk_overlap=chunk_overlap,
     )
     
-    return list(chunker.chunk_directory(input_dir))
+    return list(chunker.chunk_directory(input_dir, workers=workers))
 
 
 if __name__ == "__main__":
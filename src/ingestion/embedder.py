@@ -2,17 +2,36 @@
 Embedding generation using Ollama.
 """
 
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
 import ollama
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from src.ingestion.chunker import Chunk
+from src.ingestion.embedding_cache import EmbeddingCache
 
 
 class OllamaEmbedder:
     """Generate embeddings using Ollama's local models."""
     
-    def __init__(self, model: str = "bge-m3"):
+    def __init__(
+        self,
+        model: str = "bge-m3",
+        batch_size: int = 32,
+        concurrency: int = 1,
+        max_retries: int = 3,
+        retry_delay: float = 0.5,
+        cache: Optional[EmbeddingCache] = None,
+    ):
         self.model = model
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.cache = cache
         self._embedding_dim = None
         
     @property
@@ -31,9 +50,75 @@ class OllamaEmbedder:
         )
         return response["embedding"]
     
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed a group of texts with one call to the multi-input endpoint.
+        
+        If the server rejects the request (e.g. the batch exceeds its
+        context or payload limits), the batch is halved and each half is
+        retried, down to single texts on the legacy endpoint.
+        """
+        if not texts:
+            return []
+        
+        try:
+            response = ollama.embed(model=self.model, input=texts)
+            embeddings = response["embeddings"]
+            if len(embeddings) != len(texts):
+                raise ollama.ResponseError(
+                    f"expected {len(texts)} embeddings, got {len(embeddings)}"
+                )
+            return embeddings
+        except ollama.ResponseError:
+            if len(texts) == 1:
+                return [self.embed_text(texts[0])]
+            
+            mid = len(texts) // 2
+            return self.embed_batch(texts[:mid]) + self.embed_batch(texts[mid:])
+    
+    def _embed_batch_with_retry(self, texts: list[str]) -> list[list[float]]:
+        """Embed one batch, retrying with exponential backoff on failure."""
+        for attempt in range(self.max_retries):
+            try:
+                return self.embed_batch(texts)
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                delay = self.retry_delay * (2 ** attempt)
+                print(f"[RETRY] Embedding batch attempt {attempt + 1} failed: {e}. Retrying in {delay}s...")
+                time.sleep(delay)
+    
+    def _iter_batches(self, batches: list[list[str]]) -> Iterator[list[list[float]]]:
+        """
+        Yield embeddings batch by batch, in input order.
+        
+        With concurrency > 1 the batches run on a thread pool. At most
+        `concurrency` requests hit the server at once and at most as many
+        again wait in the pool queue, so results never pile up unboundedly
+        behind a slow batch.
+        """
+        if self.concurrency == 1:
+            for batch in batches:
+                yield self._embed_batch_with_retry(batch)
+            return
+        
+        max_pending = self.concurrency * 2
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = deque()
+            for batch in batches:
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(self._embed_batch_with_retry, batch))
+            while pending:
+                yield pending.popleft().result()
+    
     def embed_texts(self, texts: list[str], show_progress: bool = True) -> list[list[float]]:
-        """Generate embeddings for multiple texts."""
+        """Generate embeddings for multiple texts, `batch_size` texts per request."""
         embeddings = []
+        batches = [
+            texts[i:i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
         
         if show_progress:
             with Progress(
@@ -46,20 +131,46 @@ class OllamaEmbedder:
                     total=len(texts)
                 )
                 
-                for text in texts:
-                    embedding = self.embed_text(text)
-                    embeddings.append(embedding)
-                    progress.advance(task)
+                for batch_embeddings in self._iter_batches(batches):
+                    embeddings.extend(batch_embeddings)
+                    progress.advance(task, len(batch_embeddings))
         else:
-            for text in texts:
-                embeddings.append(self.embed_text(text))
+            for batch_embeddings in self._iter_batches(batches):
+                embeddings.extend(batch_embeddings)
         
         return embeddings
     
-    def embed_chunks(self, chunks: list[Chunk], show_progress: bool = True) -> list[dict]:
-        """Generate embeddings for chunks and return prepared records."""
+    def embed_chunks(
+        self,
+        chunks: list[Chunk],
+        show_progress: bool = True,
+        flush_cache: bool = True,
+    ) -> list[dict]:
+        """
+        Generate embeddings for chunks and return prepared records.
+        
+        With a cache attached, only chunks whose content is not cached for
+        this model are sent to Ollama. Pass flush_cache=False when calling
+        this per batch and flush the cache once at the end instead.
+        """
         texts = [chunk.content for chunk in chunks]
-        embeddings = self.embed_texts(texts, show_progress=show_progress)
+        
+        if self.cache is None:
+            embeddings = self.embed_texts(texts, show_progress=show_progress)
+        else:
+            embeddings = [None] * len(texts)
+            for i, embedding in self.cache.get_many(texts).items():
+                embeddings[i] = embedding
+            
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            missing_texts = [texts[i] for i in missing]
+            new_embeddings = self.embed_texts(missing_texts, show_progress=show_progress)
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+            
+            self.cache.put_many(missing_texts, new_embeddings)
+            if flush_cache:
+                self.cache.flush()
         
         records = []
         for chunk, embedding in zip(chunks, embeddings):
@@ -76,9 +187,11 @@ def embed_chunks(
     chunks: list[Chunk],
     model: str = "bge-m3",
     show_progress: bool = True,
+    batch_size: int = 32,
+    concurrency: int = 1,
 ) -> list[dict]:
     """Convenience function to embed chunks."""
-    embedder = OllamaEmbedder(model=model)
+    embedder = OllamaEmbedder(model=model, batch_size=batch_size, concurrency=concurrency)
     return embedder.embed_chunks(chunks, show_progress=show_progress)
 
 
@@ -0,0 +1,233 @@
+"""
+Content-addressed on-disk embedding cache.
+
+Embeddings are keyed by (embedding model, sha256 of the text) so that
+re-ingesting an unchanged corpus never calls the model again.
+
+Layout (one directory per model):
+- vectors.f32 / vectors.<generation>.f32: float32 matrix, one row per
+  cached text, memory-mapped on read
+- index.json: {"dim": int, "rows": int, "generation": int,
+  "entries": {hash: [row, last_used]}}
+
+When the matrix grows past `max_bytes`, the least recently used entries
+are evicted and the surviving rows are compacted into the next
+generation's matrix file. Writing index.json (atomically) is the commit
+point: until then the old index still describes the old file, so a crash
+mid-eviction never pairs an index with the wrong rows.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+def text_hash(text: str) -> str:
+    """Stable content hash used as the cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent (model, content hash) -> embedding store."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        model: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.model = model
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) / re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / "index.json"
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        self._dirty = False
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        self.generation = 0
+        self.dim, self.rows, self.entries = self._load_index()
+        self.vectors_file = self._vectors_path(self.generation)
+        self._remove_orphans()
+
+    def _vectors_path(self, generation: int) -> Path:
+        # Generation 0 keeps the pre-generation file name
+        return self.cache_dir / ("vectors.f32" if generation == 0 else f"vectors.{generation}.f32")
+
+    def _load_index(self) -> tuple[Optional[int], int, dict]:
+        if not self.index_file.exists():
+            return None, 0, {}
+        try:
+            data = json.loads(self.index_file.read_text())
+        except (OSError, ValueError):
+            return None, 0, {}
+
+        self.generation = data.get("generation", 0)
+        dim, rows = data.get("dim"), data.get("rows", 0)
+        if dim and rows:
+            vectors_file = self._vectors_path(self.generation)
+            expected = rows * dim * 4
+            size = vectors_file.stat().st_size if vectors_file.exists() else 0
+            if size < expected:
+                print(f"[WARN] Embedding cache {vectors_file} is shorter than its index, discarding the cache")
+                self.generation = 0
+                self._dirty = True
+                return None, 0, {}
+            # Drop rows appended after the last successful index write
+            if size > expected:
+                with open(vectors_file, "r+b") as f:
+                    f.truncate(expected)
+        return dim, rows, data.get("entries", {})
+
+    def _remove_orphans(self) -> None:
+        """Delete matrix files the index doesn't reference, e.g. left by an interrupted eviction."""
+        for path in self.cache_dir.glob("vectors*.f32"):
+            if path != self.vectors_file or not self.rows:
+                path.unlink(missing_ok=True)
+
+    def _open_matrix(self) -> Optional[np.memmap]:
+        if self._matrix is None and self.rows and self.dim:
+            self._matrix = np.memmap(
+                self.vectors_file, dtype=np.float32, mode="r",
+                shape=(self.rows, self.dim),
+            )
+        return self._matrix
+
+    @property
+    def size_bytes(self) -> int:
+        return self.rows * (self.dim or 0) * 4
+
+    def get_many(self, texts: list[str]) -> dict[int, list[float]]:
+        """Return {position in `texts`: embedding} for every cached text."""
+        found = {}
+        with self._lock:
+            matrix = self._open_matrix()
+            now = time.time()
+            for i, text in enumerate(texts):
+                entry = self.entries.get(text_hash(text))
+                if entry is None or matrix is None:
+                    self.stats["misses"] += 1
+                    continue
+                found[i] = matrix[entry[0]].tolist()
+                entry[1] = now
+                self._dirty = True
+                self.stats["hits"] += 1
+        return found
+
+    def put_many(self, texts: list[str], embeddings: list[list[float]]) -> None:
+        """Append embeddings for texts that are not cached yet."""
+        if not texts:
+            return
+        with self._lock:
+            new_keys, new_rows = [], []
+            for text, embedding in zip(texts, embeddings):
+                key = text_hash(text)
+                if key in self.entries or key in new_keys:
+                    continue
+                new_keys.append(key)
+                new_rows.append(embedding)
+            if not new_rows:
+                return
+
+            block = np.asarray(new_rows, dtype=np.float32)
+            if self.dim is None:
+                self.dim = block.shape[1]
+            elif block.shape[1] != self.dim:
+                raise ValueError(
+                    f"Embedding dim {block.shape[1]} does not match cache dim {self.dim}"
+                )
+
+            with open(self.vectors_file, "ab") as f:
+                block.tofile(f)
+
+            now = time.time()
+            for offset, key in enumerate(new_keys):
+                self.entries[key] = [self.rows + offset, now]
+            self.rows += len(new_keys)
+            self._matrix = None
+            self._dirty = True
+
+            if self.size_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used rows down to 90% of max_bytes and compact."""
+        row_bytes = self.dim * 4
+        keep_count = int(self.max_bytes * 0.9) // row_bytes
+        by_recency = sorted(self.entries.items(), key=lambda kv: kv[1][1], reverse=True)
+        kept = sorted(by_recency[:keep_count], key=lambda kv: kv[1][0])
+
+        old = self._open_matrix()
+        old_file = self.vectors_file
+        new_file = self._vectors_path(self.generation + 1)
+        block_rows = 65536
+        with open(new_file, "wb") as f:
+            for start in range(0, len(kept), block_rows):
+                rows = [entry[0] for _, entry in kept[start:start + block_rows]]
+                np.asarray(old[rows], dtype=np.float32).tofile(f)
+
+        self._matrix = None
+        del old
+
+        self.stats["evictions"] += len(self.entries) - len(kept)
+        self.entries = {key: [row, entry[1]] for row, (key, entry) in enumerate(kept)}
+        self.rows = len(kept)
+        self.generation += 1
+        self.vectors_file = new_file
+        # The index switches to the new file in one atomic write
+        self._write_index()
+        old_file.unlink(missing_ok=True)
+
+    def flush(self) -> None:
+        """Persist the index (vectors are written on put)."""
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    def _write_index(self) -> None:
+        tmp_file = self.index_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps({
+            "model": self.model,
+            "dim": self.dim,
+            "rows": self.rows,
+            "generation": self.generation,
+            "entries": self.entries,
+        }))
+        os.replace(tmp_file, self.index_file)
+        self._dirty = False
+
+    def get_stats(self) -> dict:
+        total = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / total if total > 0 else 0
+        return {
+            "model": self.model,
+            "entries": len(self.entries),
+            "dim": self.dim,
+            "size_mb": round(self.size_bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": f"{hit_rate:.1%}",
+            "evictions": self.stats["evictions"],
+        }
+
+
+if __name__ == "__main__":
+    from src.config import settings
+
+    cache = EmbeddingCache(
+        settings.embedding_cache_dir,
+        settings.embedding_model,
+        max_bytes=settings.embedding_cache_max_mb * 1024 * 1024,
+    )
+    for key, value in cache.get_stats().items():
+        print(f"{key}: {value}")
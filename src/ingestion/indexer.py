@@ -5,8 +5,12 @@ Handles:
 - Collection creation with proper schema
 - Vector insertion with metadata
 - BM25 index for hybrid search
+- Optional int8 / binary vector quantization
+- Deterministic point IDs for idempotent upserts
 """
 
+import hashlib
+import json
 import uuid
 from typing import Optional
 from qdrant_client import QdrantClient
@@ -15,6 +19,91 @@ from qdrant_client.http.models import Distance, VectorParams, PointStruct
 
 from src.config import settings
 
+# Namespace for uuid5 point IDs; changing it re-keys every collection
+POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "mystic-rag/chunk")
+
+
+def record_payload(record: dict) -> dict:
+    """Qdrant payload of an embedding record produced by OllamaEmbedder.embed_chunks."""
+    return {"content": record["content"], **record["metadata"]}
+
+
+def make_point_id(payload: dict) -> str:
+    """
+    Stable point ID: a fingerprint of the whole payload.
+    
+    Content, headers, total_chunks and category all go into the ID, so an
+    existing ID means the stored payload is identical. A renamed parent
+    header or an append to the file gives its chunks new IDs.
+    """
+    fingerprint = hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, fingerprint))
+
+
+def record_point_id(record: dict) -> str:
+    """Point ID for an embedding record produced by OllamaEmbedder.embed_chunks."""
+    return make_point_id(record_payload(record))
+
+
+def source_key_filter(source_keys: list[tuple[str, str]]) -> models.Filter:
+    """Points of any of the given (category, source_file) files."""
+    return models.Filter(
+        should=[
+            models.Filter(
+                must=[
+                    models.FieldCondition(key="category", match=models.MatchValue(value=category)),
+                    models.FieldCondition(key="source_file", match=models.MatchValue(value=source_file)),
+                ]
+            )
+            for category, source_file in source_keys
+        ]
+    )
+
+
+def quantization_config(mode: str) -> Optional[models.QuantizationConfig]:
+    """
+    Qdrant quantization config for a settings.qdrant_quantization value.
+    
+    Quantized vectors are kept in RAM; the float originals are only read
+    to rescore the oversampled candidates (see docs/decisions.md ADR-008).
+    """
+    if mode == "int8":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,
+            ),
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True),
+        )
+    if mode != "none":
+        raise ValueError(f"Unknown quantization mode: {mode} (expected none, int8 or binary)")
+    return None
+
+
+def quantization_search_params(mode: str, oversampling: float) -> Optional[models.QuantizationSearchParams]:
+    """Search quantized vectors, oversampled, then rescore with the originals."""
+    if mode == "none":
+        return None
+    return models.QuantizationSearchParams(
+        ignore=False,
+        rescore=True,
+        oversampling=oversampling,
+    )
+
+
+def _quantization_mode(config) -> str:
+    if isinstance(config, models.ScalarQuantization):
+        return "int8"
+    if isinstance(config, models.BinaryQuantization):
+        return "binary"
+    return "none"
+
 
 class QdrantIndexer:
     """
@@ -46,10 +135,15 @@ class QdrantIndexer:
         """
         Create collection with vector and text indexing.
         
+        Vectors are quantized per settings.qdrant_quantization. An existing
+        collection is switched to the configured mode in place.
+        
         Args:
             embedding_dim: Dimension of embedding vectors
             recreate: If True, delete existing collection first
         """
+        quantization = settings.qdrant_quantization
+        
         # Check if collection exists
         collections = self.client.get_collections().collections
         exists = any(c.name == self.collection_name for c in collections)
@@ -60,6 +154,15 @@ class QdrantIndexer:
                 print(f"Deleted existing collection: {self.collection_name}")
             else:
                 print(f"Collection {self.collection_name} already exists")
+                current = self.client.get_collection(self.collection_name).config.quantization_config
+                if _quantization_mode(current) != quantization:
+                    self.client.update_collection(
+                        collection_name=self.collection_name,
+                        quantization_config=quantization_config(quantization) or models.Disabled.DISABLED,
+                    )
+                    print(f"  - Quantization: {_quantization_mode(current)} -> {quantization}")
+                # No-op for fields that are already indexed
+                self._create_filter_indexes()
                 return
         
         # Create collection with vector config
@@ -68,7 +171,9 @@ class QdrantIndexer:
             vectors_config=VectorParams(
                 size=embedding_dim,
                 distance=Distance.COSINE,
+                on_disk=settings.qdrant_vectors_on_disk,
             ),
+            quantization_config=quantization_config(quantization),
         )
         
         # Create payload index for text search (BM25)
@@ -84,50 +189,82 @@ class QdrantIndexer:
             ),
         )
         
-        # Create index for metadata filtering
-        self.client.create_payload_index(
-            collection_name=self.collection_name,
-            field_name="source_file",
-            field_schema=models.PayloadSchemaType.KEYWORD,
-        )
+        self._create_filter_indexes()
         
         print(f"Created collection: {self.collection_name}")
         print(f"  - Vector dim: {embedding_dim}")
+        print(f"  - Quantization: {quantization}")
         print(f"  - Text index: enabled (BM25)")
-        print(f"  - Metadata index: enabled")
+        print(f"  - Metadata index: source_file, category")
+    
+    def _create_filter_indexes(self) -> None:
+        """Keyword indexes on the fields retrieval filters match on."""
+        for field_name in ("source_file", "category"):
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+    
+    def _build_points(self, records: list[dict]) -> list[PointStruct]:
+        return [
+            PointStruct(
+                id=record_point_id(record),
+                vector=record["embedding"],
+                payload=record_payload(record),
+            )
+            for record in records
+        ]
+    
+    def _existing_ids(self, ids: list[str]) -> set[str]:
+        """Subset of ids that are already stored in the collection."""
+        found = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=ids,
+            with_payload=False,
+            with_vectors=False,
+        )
+        return {str(point.id) for point in found}
     
     def index_records(
         self,
         records: list[dict],
         batch_size: int = 100,
+        skip_existing: bool = False,
+        existing_ids: Optional[set[str]] = None,
     ) -> int:
         """
         Index records into Qdrant.
         
+        Point IDs fingerprint the full payload (see make_point_id), so
+        re-indexing the same chunks overwrites them in place.
+        
         Args:
             records: List of dicts with 'content', 'embedding', 'metadata'
             batch_size: Number of records per batch
+            skip_existing: Don't re-upload points that already exist. Since
+                the ID fingerprints the whole payload, an existing ID means
+                the stored payload is identical; the vector is too, as long
+                as the embedding model hasn't changed.
+            existing_ids: IDs already known to be stored; these are skipped
+                without asking Qdrant
             
         Returns:
             Number of records indexed
         """
-        points = []
-        
-        for record in records:
-            point = PointStruct(
-                id=str(uuid.uuid4()),
-                vector=record["embedding"],
-                payload={
-                    "content": record["content"],
-                    **record["metadata"],
-                },
-            )
-            points.append(point)
+        points = self._build_points(records)
         
         # Insert in batches
         total_indexed = 0
         for i in range(0, len(points), batch_size):
             batch = points[i:i + batch_size]
+            if existing_ids is not None:
+                batch = [p for p in batch if p.id not in existing_ids]
+            if skip_existing and batch:
+                existing = self._existing_ids([p.id for p in batch])
+                batch = [p for p in batch if p.id not in existing]
+            if not batch:
+                continue
             self.client.upsert(
                 collection_name=self.collection_name,
                 points=batch,
@@ -136,6 +273,47 @@ class QdrantIndexer:
         
         return total_indexed
     
+    def get_point_ids(self, source_keys: Optional[list[tuple[str, str]]] = None) -> set[str]:
+        """IDs of all points belonging to the given (category, source_file) files, or of every point."""
+        ids = set()
+        if source_keys is not None and not source_keys:
+            return ids
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=source_key_filter(source_keys) if source_keys is not None else None,
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            ids.update(str(point.id) for point in points)
+            if offset is None:
+                return ids
+    
+    def has_points_without(self, field_name: str) -> bool:
+        """Whether any point lacks a payload field, e.g. points indexed before it existed."""
+        points, _ = self.client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=models.Filter(
+                must=[models.IsEmptyCondition(is_empty=models.PayloadField(key=field_name))]
+            ),
+            limit=1,
+            with_payload=False,
+            with_vectors=False,
+        )
+        return bool(points)
+    
+    def delete_points(self, ids: set[str]) -> None:
+        """Delete points by ID."""
+        if not ids:
+            return
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=list(ids)),
+        )
+    
     def get_collection_info(self) -> dict:
         """Get information about the collection."""
         try:
@@ -11,17 +11,26 @@ Usage:
 """
 
 import json
+import shutil
 import sys
 from pathlib import Path
 from datetime import datetime
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
+from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from src.config import settings
-from src.ingestion.chunker import MarkdownChunker, Chunk
+from src.ingestion.chunker import MarkdownChunker, Chunk, file_source_key
+from src.ingestion.chunk_store import FORMAT_VERSION, ChunkStore, ChunkStoreWriter, open_chunk_store
 from src.ingestion.embedder import OllamaEmbedder, check_ollama_available
-from src.ingestion.indexer import QdrantIndexer, check_qdrant_available
+from src.ingestion.embedding_cache import EmbeddingCache
+from src.ingestion.indexer import QdrantIndexer, check_qdrant_available, record_point_id
+from src.ingestion.manifest import IngestionManifest
+from src.ingestion.pipeline import batched, run_streaming_pipeline
+from src.ingestion.tokenizer import get_token_counter
+from src.retrieval.ann import IVFIndex
+from src.retrieval.bm25 import BM25Index
 
 
 console = Console()
@@ -31,19 +40,35 @@ def run_ingestion(
     input_dir: Path = None,
     recreate_collection: bool = True,
     save_chunks: bool = True,
+    incremental: bool = False,
 ) -> dict:
     """
     Run the full ingestion pipeline.
     
+    Chunking, embedding and indexing run as overlapping streaming stages
+    (see src/ingestion/pipeline.py), so memory stays flat as the corpus grows
+    and points become searchable while later files are still processing.
+    
     Args:
         input_dir: Directory containing markdown files
         recreate_collection: Whether to recreate the vector collection
-        save_chunks: Whether to save chunks to JSON for inspection
+        save_chunks: Whether to write the chunk store (src/ingestion/chunk_store.py)
+            and the BM25/IVF indexes built from it. If False, any existing
+            store and indexes are deleted, since they would no longer match
+            the collection.
+        incremental: Only re-process files added or modified since the
+            last run (per the manifest) and delete points of removed files.
+            Implies recreate_collection=False. Falls back to a full sync
+            (every file re-processed, every point not re-emitted deleted)
+            when there is no manifest, the chunk store is missing or
+            predates category metadata, or stored points lack a category.
         
     Returns:
         Stats dict with ingestion results
     """
     input_dir = input_dir or settings.data_raw_dir
+    if incremental:
+        recreate_collection = False
     
     console.print(Panel.fit(
         "[bold blue]Mystic RAG Ingestion Pipeline[/bold blue]\n"
@@ -62,7 +87,7 @@ def run_ingestion(
     }
     
     # Step 1: Check dependencies
-    console.print("\n[bold]Step 1/4:[/bold] Checking dependencies...")
+    console.print("\n[bold]Step 1/3:[/bold] Checking dependencies...")
     
     if not check_ollama_available(settings.embedding_model):
         stats["errors"].append(f"Ollama model {settings.embedding_model} not available")
@@ -76,29 +101,206 @@ def run_ingestion(
         return stats
     console.print(f"  Qdrant ready ({settings.qdrant_host}:{settings.qdrant_port})")
     
-    # Step 2: Chunk documents
-    console.print("\n[bold]Step 2/4:[/bold] Chunking documents...")
+    # Work out which files need processing
+    manifest = IngestionManifest(settings.data_processed_dir / "manifest.json")
+    current_files = manifest.scan(input_dir)
+    stale_sources = set()
+    # Why an incremental run can't trust its diff, if it can't
+    full_sync = None
+    
+    if incremental:
+        diff = manifest.diff(current_files)
+        file_paths = [input_dir / path for path in diff.to_process]
+        # Same-named files in different categories are different sources
+        stale_sources = {file_source_key(input_dir / path) for path in diff.stale}
+        stats["files_added"] = len(diff.added)
+        stats["files_modified"] = len(diff.modified)
+        stats["files_removed"] = len(diff.removed)
+        stats["files_unchanged"] = len(diff.unchanged)
+        console.print(
+            f"  Incremental: {len(diff.added)} added, {len(diff.modified)} modified, "
+            f"{len(diff.removed)} removed, {len(diff.unchanged)} unchanged"
+        )
+        
+        if not manifest.records:
+            full_sync = "no manifest from a previous run"
+        elif save_chunks:
+            previous_store = open_chunk_store(settings.chunk_store_dir)
+            if previous_store is None:
+                full_sync = "no chunk store from a previous run"
+            elif previous_store.version < FORMAT_VERSION:
+                full_sync = "chunk store predates category metadata"
+        
+        if not diff.has_changes and full_sync is None:
+            console.print("[green]Index is up to date, nothing to do[/green]")
+            stats["end_time"] = datetime.now().isoformat()
+            return stats
+    else:
+        file_paths = [input_dir / path for path in current_files]
+    
+    # Step 2: Prepare embedder and collection
+    console.print("\n[bold]Step 2/3:[/bold] Preparing embedder and collection...")
+    
+    cache = None
+    if settings.embedding_cache_enabled:
+        cache = EmbeddingCache(
+            settings.embedding_cache_dir,
+            settings.embedding_model,
+            max_bytes=settings.embedding_cache_max_mb * 1024 * 1024,
+        )
+    
+    embedder = OllamaEmbedder(
+        model=settings.embedding_model,
+        batch_size=settings.embedding_batch_size,
+        concurrency=settings.embedding_concurrency,
+        max_retries=settings.embedding_max_retries,
+        cache=cache,
+    )
+    embedding_dim = embedder.embedding_dim
+    console.print(f"  Embedding model: {settings.embedding_model} (dim={embedding_dim})")
     
-    chunker = MarkdownChunker(
-        chunk_size=settings.chunk_size,
-        chunk_overlap=settings.chunk_overlap,
+    indexer = QdrantIndexer()
+    indexer.create_collection(
+        embedding_dim=embedding_dim,
+        recreate=recreate_collection,
     )
     
-    chunks = []
+    if incremental and full_sync is None and indexer.has_points_without("category"):
+        full_sync = "collection has points without category metadata"
+    if full_sync is not None:
+        # Stale points and rows can't be matched per file; re-sync everything
+        console.print(f"[yellow]  Incremental run falls back to a full sync: {full_sync}[/yellow]")
+        stats["full_sync"] = full_sync
+        incremental = False
+        stale_sources = set()
+        file_paths = [input_dir / path for path in current_files]
+    
+    # Unless the collection is fresh, existing points that are not re-emitted
+    # below are stale (chunks whose payload changed, or removed files) and
+    # are deleted at the end. Point IDs fingerprint the payload, so an
+    # unchanged ID means an unchanged point.
+    if incremental:
+        existing_ids = indexer.get_point_ids(sorted(stale_sources))
+    elif not recreate_collection:
+        existing_ids = indexer.get_point_ids()
+    else:
+        existing_ids = None
+    emitted_ids = set()
+    # Changed files are always upserted in full, and so is everything on a
+    # full-sync fallback (old points may share an ID but lack newer payload
+    # fields); only a plain --no-recreate run skips points already stored
+    skip_ids = existing_ids if not incremental and full_sync is None else None
+    
+    # Step 3: Stream chunks through embedding into the index
+    console.print("\n[bold]Step 3/3:[/bold] Chunking, embedding and indexing...")
+    
+    if settings.small_to_big:
+        # Small children for matching; retrieval expands hits to their section
+        chunker = MarkdownChunker(
+            chunk_size=settings.child_chunk_size,
+            chunk_overlap=settings.child_chunk_overlap,
+        )
+    elif settings.chunk_unit == "tokens":
+        chunker = MarkdownChunker(
+            chunk_size=settings.chunk_token_budget,
+            chunk_overlap=settings.chunk_token_overlap,
+            length_function=get_token_counter(settings.chunk_tokenizer),
+            pack_sections=True,
+        )
+    else:
+        chunker = MarkdownChunker(
+            chunk_size=settings.chunk_size,
+            chunk_overlap=settings.chunk_overlap,
+        )
+    
     files_by_category = {}
     
-    for file_path in input_dir.rglob("*.md"):
-        file_chunks = chunker.chunk_file(file_path)
-        chunks.extend(file_chunks)
+    def tracked_files():
+        for file_path in file_paths:
+            # Track by category (parent folder)
+            category = file_path.parent.name
+            files_by_category[category] = files_by_category.get(category, 0) + 1
+            stats["files_processed"] += 1
+            yield file_path
+    
+    chunks_writer = None
+    store_vectors = True
+    if not save_chunks:
+        # The lexical leg and the local/ivf backends would serve stale rows
+        for stale_dir in (settings.chunk_store_dir, settings.bm25_index_dir, settings.ann_index_dir):
+            if stale_dir.exists():
+                shutil.rmtree(stale_dir)
+                console.print(f"[yellow]  Removed stale {stale_dir} (--no-save-chunks)[/yellow]")
+    else:
+        chunks_writer = ChunkStoreWriter(settings.chunk_store_dir)
+        previous_store = open_chunk_store(settings.chunk_store_dir) if incremental else None
+        if previous_store is not None:
+            if previous_store.vector_dim != embedding_dim:
+                # Can't mix embeddings of different models in one store
+                store_vectors = False
+                console.print(
+                    "[yellow]  Chunk store vectors don't match the embedding model; "
+                    "run a full ingestion to use vector_backend=local[/yellow]"
+                )
+            # Keep chunks of untouched files, replace the rest
+            chunks_writer.copy_from(
+                previous_store,
+                exclude_sources=stale_sources,
+                with_vectors=store_vectors,
+            )
+    
+    def embed(chunks: list[Chunk]) -> tuple[list[Chunk], list[dict]]:
+        return chunks, embedder.embed_chunks(chunks, show_progress=False, flush_cache=False)
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        transient=True,
+    ) as progress:
+        task = progress.add_task("Indexed 0 chunks...", total=None)
+        
+        def index(batch: tuple[list[Chunk], list[dict]]) -> None:
+            chunks, records = batch
+            stats["chunks_created"] += len(chunks)
+            stats["vectors_indexed"] += indexer.index_records(records, existing_ids=skip_ids)
+            if existing_ids is not None:
+                emitted_ids.update(record_point_id(record) for record in records)
+            if chunks_writer is not None:
+                chunks_writer.add_chunks(
+                    chunks,
+                    embeddings=[record["embedding"] for record in records] if store_vectors else None,
+                )
+            progress.update(task, description=f"Indexed {stats['chunks_created']} chunks...")
         
-        # Track by category (parent folder)
-        category = file_path.parent.name
-        if category not in files_by_category:
-            files_by_category[category] = 0
-        files_by_category[category] += 1
-        stats["files_processed"] += 1
+        completed = False
+        try:
+            run_streaming_pipeline(
+                batched(
+                    chunker.chunk_files(tracked_files(), workers=settings.chunk_workers),
+                    settings.ingest_batch_size,
+                ),
+                embed=embed,
+                index=index,
+                queue_size=settings.ingest_queue_size,
+            )
+            completed = True
+        finally:
+            if chunks_writer is not None:
+                if completed:
+                    chunks_writer.close()
+                else:
+                    chunks_writer.abort()
+            if cache is not None:
+                cache.flush()
     
-    stats["chunks_created"] = len(chunks)
+    if existing_ids is not None:
+        stale_ids = existing_ids - emitted_ids
+        indexer.delete_points(stale_ids)
+        synced = f"{len(stale_sources)} changed/removed files" if incremental else "all files"
+        console.print(
+            f"  Synced {synced}: "
+            f"{stats['vectors_indexed']} points upserted, {len(stale_ids)} deleted"
+        )
     
     # Display chunking results
     table = Table(title="Documents Processed")
@@ -110,44 +312,42 @@ def run_ingestion(
     table.add_row("[bold]Total[/bold]", f"[bold]{stats['files_processed']}[/bold]")
     
     console.print(table)
-    console.print(f"  Created {len(chunks)} chunks")
-    
-    # Optionally save chunks for inspection
-    if save_chunks:
-        chunks_file = settings.data_processed_dir / "chunks.json"
-        chunks_data = [
-            {
-                "content": c.content,
-                "metadata": c.metadata,
-                "citation": c.citation,
-            }
-            for c in chunks
-        ]
-        chunks_file.write_text(json.dumps(chunks_data, indent=2))
-        console.print(f"  Saved chunks to {chunks_file}")
-    
-    # Step 3: Generate embeddings
-    console.print("\n[bold]Step 3/4:[/bold] Generating embeddings...")
-    
-    embedder = OllamaEmbedder(model=settings.embedding_model)
-    records = embedder.embed_chunks(chunks, show_progress=True)
-    
-    embedding_dim = len(records[0]["embedding"])
-    console.print(f"  Generated {len(records)} embeddings (dim={embedding_dim})")
-    
-    # Step 4: Index in Qdrant
-    console.print("\n[bold]Step 4/4:[/bold] Indexing in Qdrant...")
-    
-    indexer = QdrantIndexer()
-    indexer.create_collection(
-        embedding_dim=embedding_dim,
-        recreate=recreate_collection,
-    )
-    
-    indexed_count = indexer.index_records(records)
-    stats["vectors_indexed"] = indexed_count
+    console.print(f"  Created {stats['chunks_created']} chunks")
+    console.print(f"  Indexed {stats['vectors_indexed']} vectors")
+    if chunks_writer is not None:
+        console.print(f"  Saved {len(chunks_writer)} chunks to {chunks_writer.store_dir}")
+        store = ChunkStore(settings.chunk_store_dir)
+        bm25 = BM25Index.from_chunk_store(store)
+        bm25.save(settings.bm25_index_dir)
+        console.print(f"  Built BM25 index: {len(bm25.terms)} terms, {len(bm25.doc_ids)} postings")
+        
+        if settings.vector_backend == "ivf" and store.vectors is not None:
+            # Incremental runs keep the trained centroids and only re-assign
+            centroids = None
+            if incremental and (settings.ann_index_dir / "meta.json").exists():
+                previous = IVFIndex.load(settings.ann_index_dir)
+                if previous.dim == store.vector_dim and previous.nlist:
+                    centroids = previous.centroids
+            ivf = IVFIndex.build(
+                store.vectors,
+                nlist=settings.ann_nlist or None,
+                nprobe=settings.ann_nprobe,
+                centroids=centroids,
+                target_recall=settings.ann_target_recall,
+            )
+            ivf.store_id = store.build_id
+            ivf.save(settings.ann_index_dir)
+            console.print(f"  Built IVF index: {ivf.nlist} lists, nprobe={ivf.nprobe}")
+    if cache is not None:
+        cache_stats = cache.get_stats()
+        stats["embedding_cache"] = cache_stats
+        console.print(
+            f"  Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']}), {cache_stats['entries']} entries, "
+            f"{cache_stats['size_mb']} MB"
+        )
     
-    console.print(f"  Indexed {indexed_count} vectors")
+    manifest.update(current_files)
     
     # Final stats
     stats["end_time"] = datetime.now().isoformat()
@@ -187,7 +387,12 @@ def main():
     parser.add_argument(
         "--no-save-chunks",
         action="store_true",
-        help="Don't save chunks JSON file",
+        help="Don't write the chunk store (deletes any existing store and BM25/IVF indexes)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-process files changed since the last run",
     )
     
     args = parser.parse_args()
@@ -196,6 +401,7 @@ def main():
         input_dir=args.input_dir,
         recreate_collection=not args.no_recreate,
         save_chunks=not args.no_save_chunks,
+        incremental=args.incremental,
     )
     
     if stats["errors"]:
@@ -0,0 +1,120 @@
+"""
+Ingestion manifest for incremental re-indexing.
+
+Records path, mtime, size and content hash of every ingested markdown
+file so the next run only has to re-process what actually changed.
+A file whose mtime and size are unchanged is trusted without re-hashing.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+
+@dataclass
+class FileRecord:
+    """Fingerprint of one ingested file."""
+
+    path: str
+    mtime: float
+    size: int
+    sha256: str
+
+
+@dataclass
+class ManifestDiff:
+    """Files added, modified, removed or unchanged since the last run."""
+
+    added: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+    @property
+    def to_process(self) -> list[str]:
+        """Files that need to be (re-)chunked and embedded."""
+        return self.added + self.modified
+
+    @property
+    def stale(self) -> list[str]:
+        """Files whose existing points must be deleted from the index."""
+        return self.added + self.modified + self.removed
+
+
+def _hash_file(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """Persistent map of relative file path -> FileRecord."""
+
+    def __init__(self, manifest_file: Path):
+        self.manifest_file = Path(manifest_file)
+        self.records: dict[str, FileRecord] = self._load()
+
+    def _load(self) -> dict[str, FileRecord]:
+        if not self.manifest_file.exists():
+            return {}
+        try:
+            data = json.loads(self.manifest_file.read_text())
+            return {path: FileRecord(**record) for path, record in data["files"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def scan(self, input_dir: Path) -> dict[str, FileRecord]:
+        """Fingerprint every markdown file under input_dir."""
+        current = {}
+        for file_path in sorted(input_dir.rglob("*.md")):
+            rel_path = file_path.relative_to(input_dir).as_posix()
+            stat = file_path.stat()
+
+            previous = self.records.get(rel_path)
+            if previous and previous.mtime == stat.st_mtime and previous.size == stat.st_size:
+                sha256 = previous.sha256
+            else:
+                sha256 = _hash_file(file_path)
+
+            current[rel_path] = FileRecord(
+                path=rel_path,
+                mtime=stat.st_mtime,
+                size=stat.st_size,
+                sha256=sha256,
+            )
+        return current
+
+    def diff(self, current: dict[str, FileRecord]) -> ManifestDiff:
+        """Compare a fresh scan against the stored manifest."""
+        result = ManifestDiff()
+        for path, record in current.items():
+            previous = self.records.get(path)
+            if previous is None:
+                result.added.append(path)
+            elif previous.sha256 != record.sha256:
+                result.modified.append(path)
+            else:
+                result.unchanged.append(path)
+        result.removed = sorted(set(self.records) - set(current))
+        return result
+
+    def update(self, current: dict[str, FileRecord]) -> None:
+        """Replace the stored records with a fresh scan and persist them."""
+        self.records = dict(current)
+        self.save()
+
+    def save(self) -> None:
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps({
+            "files": {path: asdict(record) for path, record in self.records.items()},
+        }, indent=2))
+        os.replace(tmp_file, self.manifest_file)
@@ -0,0 +1,124 @@
+"""
+Streaming chunk -> embed -> index pipeline.
+
+Each stage runs in its own thread and hands batches to the next one
+through a bounded queue. A slow stage blocks the stages feeding it
+(backpressure), so at most ~queue_size batches per stage are alive at any
+time and peak memory stays flat regardless of corpus size. Stages overlap
+in time: the first batch is indexed while later files are still being
+chunked and embedded.
+"""
+
+import queue
+import threading
+from itertools import islice
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Yield lists of up to `size` consecutive items."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> None:
+    """Blocking put that gives up once the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _produce(batches: Iterable, outbox: queue.Queue, stop: threading.Event, errors: list) -> None:
+    try:
+        for batch in batches:
+            if stop.is_set():
+                break
+            _put(outbox, batch, stop)
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        outbox.put(_DONE)
+
+
+def _transform(fn: Callable, inbox: queue.Queue, outbox: queue.Queue, stop: threading.Event, errors: list) -> None:
+    try:
+        # Keep draining after a failure so upstream never blocks on a full queue
+        for item in iter(inbox.get, _DONE):
+            if stop.is_set():
+                continue
+            try:
+                result = fn(item)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+                continue
+            _put(outbox, result, stop)
+    finally:
+        outbox.put(_DONE)
+
+
+def run_streaming_pipeline(
+    batches: Iterable[list],
+    embed: Callable[[list], list],
+    index: Callable[[list], None],
+    queue_size: int = 4,
+) -> None:
+    """
+    Run chunk batches through embed and index with bounded queues.
+
+    Args:
+        batches: Iterable of chunk batches (consumed on a producer thread)
+        embed: Turns a chunk batch into a record batch (embedding thread)
+        index: Consumes a record batch (runs on the calling thread)
+        queue_size: Max batches buffered between two stages
+
+    Raises:
+        The first exception raised by any stage, after all stages stopped.
+    """
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    chunk_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    record_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+
+    threads = [
+        threading.Thread(
+            target=_produce, args=(batches, chunk_queue, stop, errors),
+            name="ingest-chunk", daemon=True,
+        ),
+        threading.Thread(
+            target=_transform, args=(embed, chunk_queue, record_queue, stop, errors),
+            name="ingest-embed", daemon=True,
+        ),
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for records in iter(record_queue.get, _DONE):
+            if stop.is_set():
+                continue
+            try:
+                index(records)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+    finally:
+        # On interrupt, unblock the worker threads before joining them
+        stop.set()
+        while any(thread.is_alive() for thread in threads):
+            try:
+                record_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    if errors:
+        raise errors[0]
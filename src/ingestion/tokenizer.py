@@ -0,0 +1,63 @@
+"""
+Token counting for token-budget chunking.
+
+Two interchangeable length functions for MarkdownChunker:
+- approx_token_count: regex-only WordPiece-style estimate, no model needed
+- TokenCounter: exact counts from a Hugging Face tokenizer, LRU-cached
+
+Both are plain picklable callables, so they work with process-pool chunking.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable
+
+# Words are cut into <=6-char pieces to mimic WordPiece splitting long or
+# rare words; every punctuation mark is its own token.
+_PIECE_RE = re.compile(r"\w{1,6}|[^\w\s]")
+
+
+def approx_token_count(text: str) -> int:
+    """Fast approximate token count (single C-level regex scan)."""
+    return len(_PIECE_RE.findall(text))
+
+
+class TokenCounter:
+    """
+    Exact token counts from a Hugging Face tokenizer, with an LRU cache.
+
+    The tokenizer is loaded lazily on first use. Requires `transformers`
+    (installed alongside sentence-transformers).
+    """
+
+    def __init__(self, tokenizer_name: str, cache_size: int = 65536):
+        self.tokenizer_name = tokenizer_name
+        self.cache_size = cache_size
+        self._tokenizer = None
+        self._count_cached = lru_cache(maxsize=cache_size)(self._count)
+
+    def _count(self, text: str) -> int:
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+        return len(self._tokenizer.encode(text, add_special_tokens=False))
+
+    def __call__(self, text: str) -> int:
+        return self._count_cached(text)
+
+    def cache_info(self):
+        return self._count_cached.cache_info()
+
+    # The tokenizer and cache are rebuilt in worker processes
+    def __getstate__(self) -> dict:
+        return {"tokenizer_name": self.tokenizer_name, "cache_size": self.cache_size}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+
+def get_token_counter(tokenizer: str = "approx") -> Callable[[str], int]:
+    """Return the length function for a tokenizer setting value."""
+    if tokenizer == "approx":
+        return approx_token_count
+    return TokenCounter(tokenizer)
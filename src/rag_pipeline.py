@@ -10,6 +10,7 @@ from src.retrieval.retriever import HybridRetriever, RetrievedChunk
 from src.generation.generator import Generator
 from src.analytics import QueryMetrics
 from src.retrieval.query_rewriter import get_rewriter
+from src.retrieval.reranker import cascade_candidates
 
 @dataclass
 class Message:
@@ -42,6 +43,8 @@ class RAGPipeline:
         self.console = Console()
         self.use_reranker = use_reranker
         self.reranker = None
+        # Micro-batching scheduler for the reranker (settings.rerank_batching); close() it on shutdown
+        self.rerank_service = None
         self.memory: list[Message] = []
         self.max_memory: int = 10
         self.query_rewriter = get_rewriter(llm_backend)
@@ -50,11 +53,14 @@ class RAGPipeline:
             try:
                 from src.retrieval.reranker import Reranker
                 self.reranker = Reranker()
+                if settings.rerank_batching:
+                    from src.retrieval.rerank_service import RerankService
+                    self.rerank_service = RerankService(self.reranker)
             except Exception as e:
                 self.console.print(f"[yellow]Reranker not available: {e}[/yellow]")
                 self.use_reranker = False
     
-    def query(self, question: str, top_k: int = None, use_memory: bool = True, show_sources: bool = True, rewrite_query: bool = True, stream: bool = False) -> RAGResponse:
+    def query(self, question: str, top_k: int = None, use_memory: bool = True, show_sources: bool = True, rewrite_query: bool = True, stream: bool = False, filters: dict = None) -> RAGResponse:
         start_time = time.time()
         top_k = top_k or settings.rerank_top_k
         
@@ -69,13 +75,21 @@ class RAGPipeline:
         
         # Retrieve
         retrieve_k = top_k * 3 if self.use_reranker else top_k
-        chunks = self.retriever.vector_search(search_query, top_k=retrieve_k)
+        chunks = self.retriever.search(search_query, top_k=retrieve_k, filters=filters)
+        if filters and not chunks:
+            print(f"[WARN] No chunks match filters {filters}, retrying unfiltered")
+            chunks = self.retriever.search(search_query, top_k=retrieve_k)
         
         # Rerank
         reranked = False
         if self.use_reranker and self.reranker and len(chunks) > top_k:
+            if settings.rerank_cascade:
+                chunks = cascade_candidates(chunks, top_k)
+            elif settings.rerank_max_pairs:
+                chunks = chunks[:max(settings.rerank_max_pairs, top_k)]
+            # rerank() only scores when there is more than top_k to choose from
+            reranked = len(chunks) > top_k
             chunks = self.reranker.rerank(search_query, chunks, top_k=top_k)
-            reranked = True
         else:
             chunks = chunks[:top_k]
         
@@ -1,2 +1,20 @@
 """Retrieval module."""
 from src.retrieval.retriever import HybridRetriever, RetrievedChunk
+from src.retrieval.async_retriever import AsyncHybridRetriever
+from src.retrieval.bm25 import BM25Index, load_bm25_index
+from src.retrieval.ann import IVFIndex
+from src.retrieval.vector_store import IVFVectorStore, LocalVectorStore, QdrantVectorStore, VectorStore, get_vector_store
+
+__all__ = [
+    "HybridRetriever",
+    "RetrievedChunk",
+    "AsyncHybridRetriever",
+    "BM25Index",
+    "load_bm25_index",
+    "IVFIndex",
+    "IVFVectorStore",
+    "LocalVectorStore",
+    "QdrantVectorStore",
+    "VectorStore",
+    "get_vector_store",
+]
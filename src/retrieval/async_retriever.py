@@ -0,0 +1,129 @@
+"""
+Async counterpart of HybridRetriever for the API.
+
+One AsyncHybridRetriever holds an AsyncQdrantClient and an
+ollama.AsyncClient, each with a pooled keep-alive httpx connection pool
+(settings.http_*). Share a single instance across requests: concurrent
+queries reuse warm connections instead of holding a worker thread each.
+"""
+
+import asyncio
+
+import httpx
+import ollama
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+
+from src.config import settings
+from src.ingestion.chunk_store import validate_filters
+from src.retrieval.cache import get_query_embedding_cache
+from src.retrieval.retriever import KeywordSearcher, RetrievedChunk, chunk_from_payload, fuse
+from src.retrieval.small_to_big import ParentExpander
+from src.retrieval.vector_store import AsyncQdrantVectorStore, QdrantVectorStore, get_vector_store
+
+
+# Failures of Ollama, Qdrant or the network. Anything else, such as the
+# ValueError of a bad filter, is the caller's problem and propagates.
+_SERVICE_ERRORS = (httpx.HTTPError, ollama.ResponseError, ResponseHandlingException, UnexpectedResponse, OSError)
+
+
+def http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+
+class AsyncHybridRetriever:
+    def __init__(self):
+        self.client = AsyncQdrantClient(
+            host=settings.qdrant_host,
+            port=settings.qdrant_port,
+            limits=http_limits(),
+        )
+        self.ollama = ollama.AsyncClient(host=settings.ollama_host, limits=http_limits())
+        self.embedding_model = settings.embedding_model
+        self.collection = settings.qdrant_collection
+        self.keyword_searcher = KeywordSearcher()
+        self.query_cache = get_query_embedding_cache()
+        self.parent_expander = ParentExpander()
+
+        # In-process backends are CPU-bound and run in a worker thread
+        self.vector_store = get_vector_store(
+            settings.vector_backend, client=self.client, collection=self.collection,
+        )
+        if isinstance(self.vector_store, QdrantVectorStore):
+            self.vector_store = AsyncQdrantVectorStore(
+                self.client,
+                self.collection,
+                quantization=settings.qdrant_quantization,
+                oversampling=settings.qdrant_oversampling,
+            )
+
+    async def embed_query(self, query: str) -> list[float]:
+        """Query embedding, served from the shared LRU when possible."""
+        query_embedding = self.query_cache.get(self.embedding_model, query)
+        if query_embedding is None:
+            response = await self.ollama.embed(model=self.embedding_model, input=query)
+            query_embedding = response["embeddings"][0]
+            self.query_cache.put(self.embedding_model, query, query_embedding)
+        return query_embedding
+
+    async def _vector_store_search(self, query_embedding: list[float], top_k: int, filters: dict = None) -> list[tuple[dict, float]]:
+        if isinstance(self.vector_store, AsyncQdrantVectorStore):
+            return await self.vector_store.search(query_embedding, top_k=top_k, filters=filters)
+        return await asyncio.to_thread(self.vector_store.search, query_embedding, top_k, filters)
+
+    async def vector_search(self, query: str, top_k: int = 10, filters: dict = None) -> list[RetrievedChunk]:
+        validate_filters(filters)
+        try:
+            query_embedding = await self.embed_query(query)
+        except _SERVICE_ERRORS as e:
+            print(f"[ERROR] Embedding failed: {e}")
+            return []
+
+        try:
+            results = await self._vector_store_search(query_embedding, top_k, filters)
+        except _SERVICE_ERRORS as e:
+            print(f"[ERROR] Vector search failed: {e}")
+            return []
+
+        return [chunk_from_payload(payload, score) for payload, score in results]
+
+    async def keyword_search(self, query: str, top_k: int = 10, filters: dict = None) -> list[RetrievedChunk]:
+        """BM25 search over the chunk store, off the event loop."""
+        return await asyncio.to_thread(self.keyword_searcher.search, query, top_k, filters)
+
+    async def hybrid_search(self, query: str, top_k: int = 10, fusion: str = None, alpha: float = None, filters: dict = None) -> list[RetrievedChunk]:
+        """Run the BM25 and dense legs concurrently and fuse their rankings."""
+        validate_filters(filters)
+        candidates = max(top_k, settings.hybrid_candidates)
+        dense, lexical = await asyncio.gather(
+            self.vector_search(query, top_k=candidates, filters=filters),
+            self.keyword_search(query, top_k=candidates, filters=filters),
+            return_exceptions=True,
+        )
+        if isinstance(dense, BaseException):
+            print(f"[ERROR] Vector search failed: {dense}")
+            dense = []
+        if isinstance(lexical, BaseException):
+            print(f"[ERROR] Keyword search failed: {lexical}")
+            lexical = []
+        return fuse(dense, lexical, top_k, fusion=fusion, alpha=alpha)
+
+    async def search(self, query: str, top_k: int = 10, filters: dict = None) -> list[RetrievedChunk]:
+        """Search with the configured retrieval mode (settings.retrieval_mode)."""
+        if settings.retrieval_mode == "hybrid":
+            chunks = await self.hybrid_search(query, top_k=top_k, filters=filters)
+        else:
+            chunks = await self.vector_search(query, top_k=top_k, filters=filters)
+        if settings.small_to_big:
+            # The first expand opens the chunk store; keep that I/O off the event loop
+            chunks = await asyncio.to_thread(self.parent_expander.expand, chunks)
+        return chunks
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self.client.close()
+        await self.ollama.close()
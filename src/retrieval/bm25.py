@@ -0,0 +1,282 @@
+"""
+BM25 lexical search over the ingested chunk store.
+
+The inverted index is stored in CSR form as flat numpy arrays:
+- term_offsets: int64 (V + 1); postings of term t live in [offsets[t], offsets[t+1])
+- doc_ids: int32 postings, sorted by doc id within each term
+- tfs: int32 term frequencies
+- impacts: float32 precomputed BM25 contribution of each posting
+- idf, max_impacts: float32 per term (max_impacts is the MaxScore upper bound)
+- doc_lengths: int32 per document
+
+Everything is written as .npy files and loaded with mmap, so opening the
+index is O(1). Document ids are chunk store row ids.
+"""
+
+import json
+import os
+import re
+import shutil
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from src.ingestion.chunk_store import ChunkStore
+
+FORMAT_VERSION = 1
+
+_TOKEN_RE = re.compile(r"\w+")
+# Below this many postings a plain scan beats MaxScore's bookkeeping
+_MIN_POSTINGS_TO_PRUNE = 4096
+_ARRAYS = ("term_offsets", "doc_ids", "tfs", "impacts", "idf", "max_impacts", "doc_lengths")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens; numbers are kept so "Life Path 7" matches."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def chunk_store_texts(store: ChunkStore) -> Iterable[str]:
+    """Text indexed for each chunk: its header path followed by its content."""
+    for i in range(len(store)):
+        yield " ".join(store.headers(i)) + "\n" + store.text(i)
+
+
+class BM25Index:
+    """Okapi BM25 over a compact CSR inverted index, with MaxScore pruning."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms: dict[str, int] = {}
+        self.avg_doc_length = 0.0
+        self.term_offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.int32)
+        self.impacts = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.max_impacts = np.zeros(0, dtype=np.float32)
+        self.doc_lengths = np.zeros(0, dtype=np.int32)
+        # build_id of the chunk store this index was built from
+        self.store_id: Optional[str] = None
+
+    @classmethod
+    def from_chunk_store(cls, store: ChunkStore, **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        index.build(chunk_store_texts(store))
+        index.store_id = store.build_id
+        return index
+
+    def build(self, texts: Iterable[str]) -> None:
+        """Index texts in order; the i-th text gets document id i."""
+        term_col, doc_col, tf_col, lengths = array("i"), array("i"), array("i"), array("i")
+        terms: dict[str, int] = {}
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_col.append(terms.setdefault(term, len(terms)))
+                doc_col.append(doc_id)
+                tf_col.append(tf)
+
+        term_ids = np.frombuffer(term_col, dtype=np.int32)
+        # Stable sort keeps doc ids ascending inside every postings list
+        order = np.argsort(term_ids, kind="stable")
+        doc_ids = np.frombuffer(doc_col, dtype=np.int32)[order]
+        tfs = np.frombuffer(tf_col, dtype=np.int32)[order]
+        doc_lengths = np.frombuffer(lengths, dtype=np.int32).copy()
+
+        num_docs = len(doc_lengths)
+        doc_freqs = np.bincount(term_ids, minlength=len(terms))
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=term_offsets[1:])
+
+        avg = float(doc_lengths.mean()) if num_docs else 0.0
+        idf = np.log1p((num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_ids] / (avg or 1.0))
+        impacts = (np.repeat(idf, doc_freqs) * tfs * (self.k1 + 1) / (tfs + norm)).astype(np.float32)
+
+        max_impacts = np.zeros(len(terms), dtype=np.float32)
+        if len(impacts):
+            max_impacts = np.maximum.reduceat(impacts, term_offsets[:-1])
+
+        self.terms = terms
+        self.avg_doc_length = avg
+        self.term_offsets = term_offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.impacts = impacts
+        self.idf = idf.astype(np.float32)
+        self.max_impacts = max_impacts
+        self.doc_lengths = doc_lengths
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def save(self, index_dir: Path) -> None:
+        """Write the index to a temp directory and swap it into place."""
+        index_dir = Path(index_dir)
+        tmp_dir = index_dir.with_name(index_dir.name + ".tmp")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        for name in _ARRAYS:
+            np.save(tmp_dir / f"{name}.npy", getattr(self, name))
+        (tmp_dir / "meta.json").write_text(json.dumps({
+            "version": FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "num_docs": len(self),
+            "avg_doc_length": self.avg_doc_length,
+            "store_id": self.store_id,
+            "terms": list(self.terms),
+        }))
+
+        # Readers may still have the old files mapped; never truncate them in place
+        old_dir = index_dir.with_name(index_dir.name + ".old")
+        if index_dir.exists():
+            os.replace(index_dir, old_dir)
+        os.replace(tmp_dir, index_dir)
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+
+    @classmethod
+    def load(cls, index_dir: Path) -> "BM25Index":
+        """Open a saved index; postings arrays are memory-mapped."""
+        index_dir = Path(index_dir)
+        meta = json.loads((index_dir / "meta.json").read_text())
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported BM25 index version: {meta.get('version')}")
+
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index.terms = {term: i for i, term in enumerate(meta["terms"])}
+        index.avg_doc_length = meta["avg_doc_length"]
+        index.store_id = meta.get("store_id")
+        for name in _ARRAYS:
+            setattr(index, name, np.load(index_dir / f"{name}.npy", mmap_mode="r"))
+        return index
+
+    def _postings(self, term_id: int) -> tuple[np.ndarray, np.ndarray]:
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        return self.doc_ids[start:end], self.impacts[start:end]
+
+    def search(self, query: str, top_k: int = 10, rows: np.ndarray = None) -> list[tuple[int, float]]:
+        """
+        Return (doc_id, score) pairs of the top_k best matching documents,
+        optionally only among the sorted doc ids in `rows`.
+
+        Term-at-a-time MaxScore: terms are scored in decreasing order of
+        their upper bound. Once the bounds of the remaining terms can no
+        longer lift an unseen document into the top_k, only the surviving
+        candidates are looked up (binary search) in the remaining postings
+        instead of scanning them in full. A `rows` restriction is scored
+        exhaustively; filtered candidate sets are small.
+        """
+        term_ids = sorted(
+            {self.terms[t] for t in tokenize(query) if t in self.terms},
+            key=lambda t: self.max_impacts[t],
+            reverse=True,
+        )
+        if not term_ids or top_k <= 0:
+            return []
+
+        bounds = np.array([self.max_impacts[t] for t in term_ids], dtype=np.float32)
+        # remaining[i]: best score still obtainable from terms after i
+        remaining = np.append(np.cumsum(bounds[::-1])[::-1][1:], 0.0)
+        processed = np.cumsum(bounds)
+        num_postings = sum(
+            int(self.term_offsets[t + 1] - self.term_offsets[t]) for t in term_ids
+        )
+        prune = rows is None and num_postings > _MIN_POSTINGS_TO_PRUNE
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        candidates = None
+
+        for i, term_id in enumerate(term_ids):
+            docs, impacts = self._postings(term_id)
+
+            if candidates is None:
+                scores[docs] += impacts
+                if not prune or remaining[i] >= processed[i]:
+                    # The threshold can't exceed the bounds seen so far
+                    continue
+                # Only the first term's documents can be non-zero so far
+                pool = impacts if i == 0 else scores
+                if len(pool) > top_k:
+                    threshold = np.partition(pool, -top_k)[-top_k]
+                    if remaining[i] < threshold:
+                        # No unseen document can reach the top_k any more
+                        candidates = np.flatnonzero(scores + remaining[i] >= threshold)
+                continue
+
+            pos = np.searchsorted(docs, candidates)
+            pos[pos == len(docs)] = 0
+            hit = docs[pos] == candidates
+            scores[candidates[hit]] += impacts[pos[hit]]
+
+            candidate_scores = scores[candidates]
+            if len(candidates) > top_k:
+                threshold = np.partition(candidate_scores, -top_k)[-top_k]
+                candidates = candidates[candidate_scores + remaining[i] >= threshold]
+
+        if rows is not None:
+            candidates = rows[scores[rows] > 0]
+        elif candidates is None:
+            candidates = np.flatnonzero(scores)
+        candidate_scores = scores[candidates]
+        if len(candidates) > top_k:
+            # Keep every document tied with the k-th score so ties break by doc id
+            kth = np.partition(candidate_scores, -top_k)[-top_k]
+            best = candidate_scores >= kth
+            candidates, candidate_scores = candidates[best], candidate_scores[best]
+        order = np.lexsort((candidates, -candidate_scores))[:top_k]
+        return [(int(candidates[j]), float(candidate_scores[j])) for j in order]
+
+
+def load_bm25_index(index_dir: Path = None, store: ChunkStore = None) -> Optional[BM25Index]:
+    """
+    Load the persisted index, or build one in memory from the chunk store
+    if it is missing or out of date. Returns None without a chunk store.
+    """
+    from src.config import settings
+    from src.ingestion.chunk_store import open_chunk_store
+
+    index_dir = Path(index_dir or settings.bm25_index_dir)
+    store = store or open_chunk_store()
+    if store is None:
+        return None
+
+    if (index_dir / "meta.json").exists():
+        index = BM25Index.load(index_dir)
+        if store.build_id is not None and index.store_id == store.build_id and len(index) == len(store):
+            return index
+        print("[WARN] BM25 index is out of date with the chunk store, rebuilding in memory")
+    return BM25Index.from_chunk_store(store)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from src.config import settings
+    from src.ingestion.chunk_store import open_chunk_store
+
+    store = open_chunk_store()
+    if store is None:
+        print("No chunk store found. Run: make ingest")
+        sys.exit(1)
+
+    index = BM25Index.from_chunk_store(store)
+    index.save(settings.bm25_index_dir)
+    print(f"Indexed {len(index)} chunks, {len(index.terms)} terms, {len(index.doc_ids)} postings")
+
+    query = " ".join(sys.argv[1:]) or "Life Path 7 careers"
+    start = time.perf_counter()
+    hits = index.search(query, top_k=5)
+    print(f"\n{query!r} ({(time.perf_counter() - start) * 1000:.3f} ms)")
+    for doc_id, score in hits:
+        print(f"  {score:6.3f}  {store[doc_id].citation}")
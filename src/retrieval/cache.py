@@ -1,8 +1,10 @@
-"""Semantic cache for similar queries."""
+"""Semantic cache for similar queries, and LRUs of query embeddings and rerank scores."""
 
 import hashlib
 import json
+import threading
 import time
+from collections import OrderedDict
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import numpy as np
@@ -141,3 +143,119 @@ def get_cache() -> SemanticCache:
     if _cache is None:
         _cache = SemanticCache()
     return _cache
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU with hit/miss counters and an optional TTL.
+    
+    Subclasses build the keys; entries older than ttl seconds (if set)
+    count as misses and are dropped on access.
+    """
+    
+    size_label = "cached_entries"
+    
+    def __init__(self, max_size: int = 1024, ttl: float = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+    
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+    
+    def _get(self, key):
+        """Value for key, or None. Call with the lock held."""
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+    
+    def _put(self, key, value) -> None:
+        """Store value under key. Call with the lock held."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> dict:
+        total = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / total if total > 0 else 0
+        return {
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": f"{hit_rate:.1%}",
+            self.size_label: len(self._entries),
+        }
+
+
+class QueryEmbeddingCache(LRUCache):
+    """
+    Bounded in-memory LRU of normalized query text -> query embedding.
+    
+    Keys include the embedding model, so switching models never returns
+    stale vectors. Thread-safe; shared by every retriever in the process.
+    """
+    
+    size_label = "cached_queries"
+    
+    def get(self, model: str, query: str) -> Optional[list]:
+        with self._lock:
+            return self._get((model, self.normalize(query)))
+    
+    def put(self, model: str, query: str, embedding: list) -> None:
+        with self._lock:
+            self._put((model, self.normalize(query)), embedding)
+
+
+class RerankScoreCache(LRUCache):
+    """
+    Bounded LRU/TTL of cross-encoder scores, keyed by reranker model,
+    normalized query and chunk id.
+    
+    Normalizing case and whitespace is exact for uncased cross-encoders
+    such as ms-marco-MiniLM, whose tokenizer discards both anyway.
+    """
+    
+    size_label = "cached_pairs"
+    
+    def get_many(self, model: str, query: str, chunk_ids: list[str]) -> list[Optional[float]]:
+        query = self.normalize(query)
+        with self._lock:
+            return [self._get((model, query, chunk_id)) for chunk_id in chunk_ids]
+    
+    def put_many(self, model: str, query: str, scores: dict[str, float]) -> None:
+        query = self.normalize(query)
+        with self._lock:
+            for chunk_id, score in scores.items():
+                self._put((model, query, chunk_id), score)
+
+_query_embedding_cache = None
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        from src.config import settings
+        _query_embedding_cache = QueryEmbeddingCache(settings.query_embedding_cache_size)
+    return _query_embedding_cache
+
+_rerank_cache = None
+
+def get_rerank_cache() -> RerankScoreCache:
+    global _rerank_cache
+    if _rerank_cache is None:
+        from src.config import settings
+        _rerank_cache = RerankScoreCache(settings.rerank_cache_size, ttl=settings.rerank_cache_ttl or None)
+    return _rerank_cache
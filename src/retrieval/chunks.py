@@ -0,0 +1,38 @@
+"""Retrieved chunk type and helpers shared by the retrievers and small-to-big expansion."""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class RetrievedChunk:
+    text: str
+    citation: str
+    score: float
+    metadata: dict = None
+
+
+def chunk_from_payload(payload: dict, score: float) -> RetrievedChunk:
+    """Build a RetrievedChunk from an indexer payload (or the legacy text/category/source one)."""
+    if "content" in payload:
+        citation = f"{payload.get('source_file', 'unknown')}: {payload.get('headers') or 'Introduction'}"
+        text = payload["content"]
+    else:
+        citation = f"{payload.get('category', 'unknown')}/{payload.get('source', 'unknown')}"
+        text = payload.get("text", "")
+    return RetrievedChunk(text=text, citation=citation, score=score, metadata=payload)
+
+
+def join_spans(spans: list[str]) -> str:
+    """Concatenate consecutive chunks, dropping the overlap each repeats from the previous one."""
+    if not spans:
+        return ""
+    text = spans[0]
+    for span in spans[1:]:
+        overlap = 0
+        for k in range(min(len(text), len(span)), 0, -1):
+            if text.endswith(span[:k]):
+                overlap = k
+                break
+        # Ignore coincidental one or two character matches
+        text = text + span[overlap:] if overlap > 2 else text + "\n" + span
+    return text
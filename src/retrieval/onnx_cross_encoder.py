@@ -0,0 +1,137 @@
+"""
+Cross-encoder inference on ONNX Runtime, for CPU-only rerank nodes.
+
+OnnxCrossEncoder.predict() is a drop-in for
+sentence_transformers.CrossEncoder.predict(): the same pair encoding
+(longest-first truncation, [CLS] query [SEP] passage [SEP]) and the same
+activation on the logits. It needs onnxruntime and tokenizers only, not
+PyTorch.
+
+The model directory is written once by export_onnx(), which needs
+optimum[exporters] (and so PyTorch) on the exporting machine:
+- model.onnx: the fp32 graph
+- model_int8.onnx: the same graph with dynamically int8 quantized
+  weights (smaller and faster on CPU, scores shift slightly)
+- config.json, tokenizer.json: model config and fast tokenizer
+
+Usage:
+    python -m src.retrieval.onnx_cross_encoder [model_name] [out_dir]
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+
+
+def _activation(config: dict):
+    """The activation CrossEncoder applies to this model's logits."""
+    name = (
+        config.get("sentence_transformers", {}).get("activation_fn")
+        or config.get("sbert_ce_default_activation_function")
+    )
+    if name is None:
+        # CrossEncoder's default: sigmoid for single-logit models
+        name = "Sigmoid" if len(config.get("id2label", {"0": None})) == 1 else "Identity"
+    if name.endswith("Sigmoid"):
+        return lambda logits: 1 / (1 + np.exp(-logits))
+    return lambda logits: logits
+
+
+class OnnxCrossEncoder:
+    """CrossEncoder-compatible scorer over an exported ONNX model directory."""
+
+    def __init__(self, model_dir: Path, int8: bool = False, threads: int = 0, max_length: int = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        model_file = model_dir / (INT8_FILE if int8 else FP32_FILE)
+        if not model_file.exists():
+            raise FileNotFoundError(
+                f"{model_file} not found, export it with: python -m src.retrieval.onnx_cross_encoder"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_file), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        config = json.loads((model_dir / "config.json").read_text())
+        self.activation = _activation(config)
+
+        if max_length is None:
+            tokenizer_config = model_dir / "tokenizer_config.json"
+            model_max = 512
+            if tokenizer_config.exists():
+                model_max = json.loads(tokenizer_config.read_text()).get("model_max_length", 512)
+            max_length = min(model_max, config.get("max_position_embeddings", 512))
+        self.max_length = max_length
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length, strategy="longest_first")
+        pad_id = config.get("pad_token_id") or 0
+        self.tokenizer.enable_padding(pad_id=pad_id, pad_token=self.tokenizer.id_to_token(pad_id))
+
+    def _encode(self, pairs: list[tuple[str, str]]) -> dict:
+        encodings = self.tokenizer.encode_batch(pairs)
+        feed = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        return {name: array for name, array in feed.items() if name in self.input_names}
+
+    def predict(self, pairs: list[tuple[str, str]], batch_size: int = 32) -> np.ndarray:
+        """Scores of (query, passage) pairs, like CrossEncoder.predict()."""
+        pairs = [tuple(pair) for pair in pairs]
+        if not pairs:
+            return np.zeros(0, dtype=np.float32)
+        logits = np.concatenate([
+            self.session.run(None, self._encode(pairs[start:start + batch_size]))[0]
+            for start in range(0, len(pairs), batch_size)
+        ])
+        if logits.shape[1] == 1:
+            logits = logits[:, 0]
+        return self.activation(logits)
+
+
+def export_onnx(model_name: str, out_dir: Path, int8: bool = True) -> Path:
+    """Export a Hugging Face cross-encoder to out_dir (fp32, plus int8 if asked)."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(
+            str(out_dir / FP32_FILE),
+            str(out_dir / INT8_FILE),
+            weight_type=QuantType.QInt8,
+        )
+    return out_dir
+
+
+if __name__ == "__main__":
+    import sys
+    from src.config import settings
+
+    model_name = sys.argv[1] if len(sys.argv) > 1 else settings.reranker_model
+    out_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else settings.reranker_onnx_dir
+
+    print(f"Exporting {model_name} to {out_dir}...")
+    export_onnx(model_name, out_dir)
+    for name in (FP32_FILE, INT8_FILE):
+        size = (out_dir / name).stat().st_size / 1024 / 1024
+        print(f"  {name}: {size:.1f} MB")
+    print("Set RERANKER_BACKEND=onnx (and RERANKER_ONNX_INT8=true for the quantized model)")
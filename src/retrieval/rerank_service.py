@@ -0,0 +1,131 @@
+"""
+Cross-request micro-batching for the reranker.
+
+Under concurrent load every RAGPipeline.query used to run its own small
+cross-encoder call. A RerankService attached to a Reranker takes over
+its model calls: a background thread collects the uncached pairs of
+concurrent rerank() calls for up to max_wait_ms (or until max_batch
+pairs are waiting), scores them in one length-bucketed pass, and hands
+every caller back its own scores. The merged batch is predicted with
+max_batch as the batch size, not settings.reranker_batch_size, so it
+costs one forward pass per length bucket rather than one per
+reranker_batch_size pairs.
+
+A lone request waits at most max_wait_ms longer than before; at high QPS
+the model sees a few large batches instead of many small ones. All model
+calls happen on the service thread, so the model is never run from two
+threads at once.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from src.config import settings
+
+
+@dataclass
+class _Request:
+    pairs: list[tuple[str, str]]
+    future: Future
+
+
+class RerankService:
+    """Micro-batching scheduler in front of a Reranker's model."""
+
+    def __init__(self, reranker, max_wait_ms: float = None, max_batch: int = None):
+        self.reranker = reranker
+        self.max_wait = (settings.rerank_batch_wait_ms if max_wait_ms is None else max_wait_ms) / 1000
+        self.max_batch = max_batch or settings.rerank_batch_max_pairs
+        self.stats = {"requests": 0, "pairs": 0, "batches": 0}
+        self._queue: queue.Queue = queue.Queue()
+        # Guards _closed and queue puts, so nothing is queued behind the stop marker
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="rerank-service", daemon=True)
+        self._thread.start()
+        reranker.scheduler = self
+
+    def submit(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """Scores of pairs, computed in a shared batch; blocks until ready."""
+        if not pairs:
+            return []
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RerankService is closed")
+            self._queue.put(_Request(pairs, future))
+        return future.result()
+
+    def _collect(self, first: _Request) -> list[_Request]:
+        """first plus whatever arrives within max_wait, up to max_batch pairs."""
+        batch = [first]
+        waiting = len(first.pairs)
+        deadline = time.monotonic() + self.max_wait
+        while waiting < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                # Closing: finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(request)
+            waiting += len(request.pairs)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            pairs = [pair for request in batch for pair in request.pairs]
+            try:
+                scores = self.reranker._predict(pairs, batch_size=self.max_batch)
+            except Exception as e:
+                print(f"[ERROR] Batched rerank failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            start = 0
+            for request in batch:
+                end = start + len(request.pairs)
+                request.future.set_result(scores[start:end])
+                start = end
+            self.stats["requests"] += len(batch)
+            self.stats["pairs"] += len(pairs)
+            self.stats["batches"] += 1
+
+    def close(self) -> None:
+        """Stop the service thread after the pending requests; the reranker scores inline again."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+        self.reranker.scheduler = None
+        # Nothing should be left, but never leave a caller blocked on its future
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and not request.future.done():
+                request.future.set_exception(RuntimeError("RerankService is closed"))
+
+    def get_stats(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "requests_per_batch": round(self.stats["requests"] / batches, 2) if batches else 0,
+            "pairs_per_batch": round(self.stats["pairs"] / batches, 1) if batches else 0,
+        }
@@ -1,23 +1,182 @@
 """Cross-encoder reranking."""
 
-from sentence_transformers import CrossEncoder
+import hashlib
+
+from src.config import settings
+from src.ingestion.tokenizer import approx_token_count
+from src.retrieval.cache import get_rerank_cache
 from src.retrieval.retriever import RetrievedChunk
 
 
+def chunk_id(chunk: RetrievedChunk) -> str:
+    """Stable id of the text being scored: its content hash."""
+    metadata = chunk.metadata or {}
+    return metadata.get("content_hash") or hashlib.sha256(chunk.text.encode("utf-8")).hexdigest()
+
+
+# Upper token lengths of the padding buckets; longer pairs share the last one
+LENGTH_BUCKETS = (32, 64, 128, 256)
+
+
+def length_batches(lengths: list[int], max_batch: int) -> list[list[int]]:
+    """
+    Group pair indices into inference batches of similar length.
+    
+    Indices are sorted by length and cut whenever a batch is full or the
+    next pair falls into a longer LENGTH_BUCKETS bucket, so every batch
+    pads only to its own longest pair.
+    """
+    def bucket(length: int) -> int:
+        return next((i for i, bound in enumerate(LENGTH_BUCKETS) if length <= bound), len(LENGTH_BUCKETS))
+    
+    batches, current, current_bucket = [], [], None
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        b = bucket(lengths[i])
+        if current and (b != current_bucket or len(current) >= max_batch):
+            batches.append(current)
+            current = []
+        current.append(i)
+        current_bucket = b
+    if current:
+        batches.append(current)
+    return batches
+
+
+def cascade_candidates(
+    chunks: list[RetrievedChunk],
+    top_k: int,
+    gap: float = None,
+    max_pairs: int = None,
+) -> list[RetrievedChunk]:
+    """
+    First stage of a rerank cascade: keep the candidates worth a
+    cross-encoder pass, ranked by their retrieval score.
+    
+    Retrieval scores are min-max normalized over the candidates (cosine,
+    fused and RRF scores all live on different scales). A candidate more
+    than `gap` below the top_k-th best is dropped. At most `max_pairs`
+    candidates survive (0 = no cap), and never fewer than top_k.
+    """
+    gap = settings.rerank_cascade_gap if gap is None else gap
+    max_pairs = settings.rerank_max_pairs if max_pairs is None else max_pairs
+    ranked = sorted(chunks, key=lambda c: c.score, reverse=True)
+    if len(ranked) <= top_k:
+        return ranked
+    
+    high, low = ranked[0].score, ranked[-1].score
+    spread = (high - low) or 1.0
+    floor = (ranked[top_k - 1].score - low) / spread - gap
+    survivors = ranked[:top_k] + [c for c in ranked[top_k:] if (c.score - low) / spread >= floor]
+    if max_pairs:
+        survivors = survivors[:max(max_pairs, top_k)]
+    return survivors
+
+
 class Reranker:
-    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
-        self.model = CrossEncoder(model_name)
+    """
+    Rerank retrieved chunks with a cross-encoder.
+    
+    Backends (settings.reranker_backend):
+    - torch: sentence-transformers CrossEncoder in PyTorch fp32
+    - onnx: an exported copy on ONNX Runtime, fp32 or dynamically int8
+      quantized (src/retrieval/onnx_cross_encoder.py); no PyTorch needed
+    
+    Scores are cached per (model, normalized query, chunk id) in a shared
+    LRU/TTL cache, so only new pairs reach the model. Uncached pairs are
+    truncated to settings.reranker_max_tokens and scored in length-bucketed
+    batches of up to settings.reranker_batch_size (see length_batches).
+    """
+    
+    def __init__(self, model_name: str = None, backend: str = None):
+        self.model_name = model_name or settings.reranker_model
+        self.backend = backend or settings.reranker_backend
+        
+        if self.backend == "onnx":
+            from src.retrieval.onnx_cross_encoder import OnnxCrossEncoder
+            self.model = OnnxCrossEncoder(
+                settings.reranker_onnx_dir,
+                int8=settings.reranker_onnx_int8,
+                threads=settings.reranker_threads,
+                max_length=settings.reranker_max_tokens,
+            )
+        elif self.backend == "torch":
+            from sentence_transformers import CrossEncoder
+            self.model = CrossEncoder(self.model_name, max_length=settings.reranker_max_tokens)
+        else:
+            raise ValueError(f"Unknown reranker backend: {self.backend} (expected torch or onnx)")
+        
+        # int8 and truncated scores differ, so they are cached apart
+        int8 = self.backend == "onnx" and settings.reranker_onnx_int8
+        self.cache_key = f"{self.model_name}:{self.backend}{'-int8' if int8 else ''}:{settings.reranker_max_tokens}"
+        self.cache = get_rerank_cache()
+        self.batch_size = settings.reranker_batch_size
+        # Estimated tokens: real ones, and what padding every batch to its longest pair costs
+        self.padding_stats = {"pairs": 0, "batches": 0, "tokens": 0, "padded_tokens": 0, "unbucketed_padded_tokens": 0}
+        # Set by an attached RerankService, which then runs every model call
+        self.scheduler = None
+    
+    def _predict(self, pairs: list[tuple[str, str]], batch_size: int = None) -> list[float]:
+        """
+        model.predict over length-bucketed batches; scores come back in input order.
+        
+        batch_size caps the pairs per forward pass (default
+        settings.reranker_batch_size); a RerankService passes its own
+        rerank_batch_max_pairs so a merged batch isn't split up again.
+        """
+        batch_size = batch_size or self.batch_size
+        # [CLS] query [SEP] passage [SEP], capped at the truncation budget
+        lengths = [
+            min(approx_token_count(q) + approx_token_count(p) + 3, settings.reranker_max_tokens)
+            for q, p in pairs
+        ]
+        scores = [0.0] * len(pairs)
+        for batch in length_batches(lengths, batch_size):
+            predicted = self.model.predict([pairs[i] for i in batch], batch_size=len(batch))
+            for i, s in zip(batch, predicted):
+                scores[i] = float(s)
+            self.padding_stats["batches"] += 1
+            self.padding_stats["padded_tokens"] += max(lengths[i] for i in batch) * len(batch)
+        
+        self.padding_stats["pairs"] += len(pairs)
+        self.padding_stats["tokens"] += sum(lengths)
+        # The same pairs in arrival order, in batch_size slices
+        self.padding_stats["unbucketed_padded_tokens"] += sum(
+            max(lengths[start:start + batch_size]) * len(lengths[start:start + batch_size])
+            for start in range(0, len(lengths), batch_size)
+        )
+        return scores
+    
+    def get_padding_stats(self) -> dict:
+        stats = self.padding_stats
+        saved = 1 - stats["padded_tokens"] / stats["unbucketed_padded_tokens"] if stats["unbucketed_padded_tokens"] else 0
+        return {
+            **stats,
+            "padding_overhead": f"{stats['padded_tokens'] / stats['tokens'] - 1:.1%}" if stats["tokens"] else "0.0%",
+            "padding_saved": f"{saved:.1%}",
+        }
+    
+    def score(self, query: str, chunks: list[RetrievedChunk]) -> list[float]:
+        """Cross-encoder scores of chunks for query; only cache misses are predicted."""
+        ids = [chunk_id(c) for c in chunks]
+        scores = self.cache.get_many(self.cache_key, query, ids)
+        missing = [i for i, s in enumerate(scores) if s is None]
+        if missing:
+            pairs = [(query, chunks[i].text) for i in missing]
+            predicted = self.scheduler.submit(pairs) if self.scheduler else self._predict(pairs)
+            for i, s in zip(missing, predicted):
+                scores[i] = float(s)
+            self.cache.put_many(self.cache_key, query, {ids[i]: scores[i] for i in missing})
+        return scores
     
     def rerank(self, query: str, chunks: list[RetrievedChunk], top_k: int = 5) -> list[RetrievedChunk]:
         if not chunks or len(chunks) <= top_k:
             return chunks
         
-        pairs = [(query, chunk.content) for chunk in chunks]
-        scores = self.model.predict(pairs)
+        scores = self.score(query, chunks)
         scored = sorted(zip(chunks, scores), key=lambda x: x[1], reverse=True)
         
         return [
-            RetrievedChunk(content=c.content, source_file=c.source_file, headers=c.headers, score=float(s))
+            RetrievedChunk(text=c.text, citation=c.citation, score=float(s), metadata=c.metadata)
             for c, s in scored[:top_k]
         ]
 
@@ -28,7 +187,7 @@ if __name__ == "__main__":
     from rich.table import Table
     
     console = Console()
-    console.print("[bold]Loading reranker...[/bold]")
+    console.print(f"[bold]Loading reranker ({settings.reranker_backend})...[/bold]")
     reranker = Reranker()
     
     retriever = HybridRetriever()
@@ -1,48 +1,259 @@
 """Hybrid retriever with error handling."""
 
-from dataclasses import dataclass
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from qdrant_client import QdrantClient
-from qdrant_client.models import SearchParams
 
+from src.config import settings
+from src.ingestion.chunk_store import open_chunk_store
 from src.ingestion.embedder import OllamaEmbedder
+from src.retrieval.bm25 import load_bm25_index
+from src.retrieval.cache import get_query_embedding_cache
+from src.retrieval.chunks import RetrievedChunk, chunk_from_payload
+from src.retrieval.small_to_big import ParentExpander
+from src.retrieval.vector_store import get_vector_store
+
+
+def _fusion_key(chunk: RetrievedChunk):
+    metadata = chunk.metadata or {}
+    if "source_file" in metadata and "chunk_index" in metadata:
+        return metadata.get("category", ""), metadata["source_file"], metadata["chunk_index"]
+    return chunk.text
+
+
+def fuse_alpha(dense: list[RetrievedChunk], lexical: list[RetrievedChunk], alpha: float) -> list[RetrievedChunk]:
+    """Weighted sum of min-max normalized scores: alpha * dense + (1 - alpha) * lexical."""
+    fused: dict = {}
+    for hits, weight in ((dense, alpha), (lexical, 1 - alpha)):
+        if not hits:
+            continue
+        high = max(c.score for c in hits)
+        low = min(c.score for c in hits)
+        spread = (high - low) or 1.0
+        for c in hits:
+            key = _fusion_key(c)
+            if key not in fused:
+                fused[key] = [c, 0.0]
+            fused[key][1] += weight * (c.score - low) / spread
+    return _ranked(fused)
+
+
+def fuse_rrf(dense: list[RetrievedChunk], lexical: list[RetrievedChunk], k: int = 60) -> list[RetrievedChunk]:
+    """Reciprocal rank fusion: sum of 1 / (k + rank) over both legs."""
+    fused: dict = {}
+    for hits in (dense, lexical):
+        for rank, c in enumerate(hits, 1):
+            key = _fusion_key(c)
+            if key not in fused:
+                fused[key] = [c, 0.0]
+            fused[key][1] += 1.0 / (k + rank)
+    return _ranked(fused)
+
+
+def _ranked(fused: dict) -> list[RetrievedChunk]:
+    ranked = sorted(fused.values(), key=lambda item: item[1], reverse=True)
+    return [
+        RetrievedChunk(text=c.text, citation=c.citation, score=score, metadata=c.metadata)
+        for c, score in ranked
+    ]
+
+
+class KeywordSearcher:
+    """BM25 over the chunk store, opened lazily on first search."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._chunk_store = None
+        self._bm25 = None
+
+    def _load(self) -> bool:
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                try:
+                    self._chunk_store = open_chunk_store()
+                except Exception as e:
+                    print(f"[ERROR] Chunk store unreadable: {e}")
+                if self._chunk_store is None:
+                    print("[WARN] No chunk store found, hybrid search falls back to dense only")
+                else:
+                    self._bm25 = load_bm25_index(store=self._chunk_store)
+        return self._bm25 is not None
+
+    def search(self, query: str, top_k: int = 10, filters: dict = None) -> list[RetrievedChunk]:
+        if not self._load():
+            return []
+
+        rows = self._chunk_store.rows_matching(filters) if filters else None
+        chunks = []
+        for doc_id, score in self._bm25.search(query, top_k=top_k, rows=rows):
+            chunk = self._chunk_store[doc_id]
+            chunks.append(RetrievedChunk(
+                text=chunk.content,
+                citation=chunk.citation,
+                score=score,
+                metadata={"content": chunk.content, **chunk.metadata},
+            ))
+        return chunks
+
+
+def fuse(dense: list[RetrievedChunk], lexical: list[RetrievedChunk], top_k: int, fusion: str = None, alpha: float = None) -> list[RetrievedChunk]:
+    """Fuse dense and BM25 hits with the configured (or given) fusion method."""
+    fusion = fusion or settings.hybrid_fusion
+    alpha = settings.hybrid_alpha if alpha is None else alpha
+    if not lexical:
+        return dense[:top_k]
+    if fusion == "rrf":
+        return fuse_rrf(dense, lexical, k=settings.rrf_k)[:top_k]
+    return fuse_alpha(dense, lexical, alpha)[:top_k]
 
-@dataclass
-class RetrievedChunk:
-    text: str
-    citation: str
-    score: float
-    metadata: dict = None
 
 class HybridRetriever:
     def __init__(self):
-        self.client = QdrantClient(host="qdrant", port=6333)
-        self.embedder = OllamaEmbedder(model="nomic-embed-text")
-        self.collection = "mystic_rag"
-    
-    def vector_search(self, query: str, top_k: int = 10) -> list[RetrievedChunk]:
-        try:
+        self.client = QdrantClient(host=settings.qdrant_host, port=settings.qdrant_port)
+        self.embedder = OllamaEmbedder(model=settings.embedding_model)
+        self.collection = settings.qdrant_collection
+        self.vector_store = get_vector_store(
+            settings.vector_backend, client=self.client, collection=self.collection,
+        )
+        self.keyword_searcher = KeywordSearcher()
+        self.query_cache = get_query_embedding_cache()
+        self.parent_expander = ParentExpander()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retriever")
+
+    def embed_query(self, query: str) -> list[float]:
+        """Query embedding, served from the shared LRU when possible."""
+        query_embedding = self.query_cache.get(self.embedder.model, query)
+        if query_embedding is None:
             query_embedding = self.embedder.embed_text(query)
+            self.query_cache.put(self.embedder.model, query, query_embedding)
+        return query_embedding
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Embeddings for many queries; all cache misses go out in one embed call."""
+        embeddings = [self.query_cache.get(self.embedder.model, q) for q in queries]
+        missing = list(dict.fromkeys(q for q, e in zip(queries, embeddings) if e is None))
+        if missing:
+            embedded = dict(zip(missing, self.embedder.embed_batch(missing)))
+            for q, e in embedded.items():
+                self.query_cache.put(self.embedder.model, q, e)
+            embeddings = [e if e is not None else embedded[q] for q, e in zip(queries, embeddings)]
+        return embeddings
+
+    def vector_search(self, query: str, top_k: int = 10, filters: dict = None) -> list[RetrievedChunk]:
+        """
+        Dense search, optionally restricted to chunks matching `filters`.
+
+        Args:
+            query: Search query
+            top_k: Number of results
+            filters: Payload field -> accepted value(s), on source_file and/or
+                category, e.g. {"source_file": ["dragon", "life_path_7"]}
+        """
+        try:
+            query_embedding = self.embed_query(query)
         except Exception as e:
             print(f"[ERROR] Embedding failed: {e}")
             return []
-        
+
         try:
-            results = self.client.search(
-                collection_name=self.collection,
-                query_vector=query_embedding,
-                limit=top_k,
-                search_params=SearchParams(hnsw_ef=128, exact=False)
-            )
+            results = self.vector_store.search(query_embedding, top_k=top_k, filters=filters)
         except Exception as e:
-            print(f"[ERROR] Qdrant search failed: {e}")
+            print(f"[ERROR] Vector search failed: {e}")
             return []
-        
-        chunks = []
-        for r in results:
-            chunks.append(RetrievedChunk(
-                text=r.payload.get("text", ""),
-                citation=f"{r.payload.get('category', 'unknown')}/{r.payload.get('source', 'unknown')}",
-                score=r.score,
-                metadata=r.payload
-            ))
-        return chunks
+
+        return [chunk_from_payload(payload, score) for payload, score in results]
+
+    def vector_search_batch(self, queries: list[str], top_k: int = 10, filters: list = None) -> list[list[RetrievedChunk]]:
+        """Dense search for many queries: one embedding call, one vector search request."""
+        try:
+            query_embeddings = self.embed_queries(queries)
+        except Exception as e:
+            print(f"[ERROR] Embedding failed: {e}")
+            return [[] for _ in queries]
+
+        try:
+            results = self.vector_store.search_batch(query_embeddings, top_k=top_k, filters=filters)
+        except Exception as e:
+            print(f"[ERROR] Vector search failed: {e}")
+            return [[] for _ in queries]
+
+        return [[chunk_from_payload(payload, score) for payload, score in hits] for hits in results]
+
+    def keyword_search(self, query: str, top_k: int = 10, filters: dict = None) -> list[RetrievedChunk]:
+        """BM25 search over the ingested chunk store."""
+        return self.keyword_searcher.search(query, top_k=top_k, filters=filters)
+
+    def hybrid_search(self, query: str, top_k: int = 10, fusion: str = None, alpha: float = None, filters: dict = None) -> list[RetrievedChunk]:
+        """
+        Run the BM25 and dense legs concurrently and fuse their rankings.
+
+        Args:
+            query: Search query
+            top_k: Number of fused results
+            fusion: "alpha" or "rrf" (default: settings.hybrid_fusion)
+            alpha: Dense weight for alpha fusion (default: settings.hybrid_alpha)
+            filters: Restrict both legs to matching chunks (see vector_search)
+        """
+        candidates = max(top_k, settings.hybrid_candidates)
+
+        lexical_future = self._executor.submit(self.keyword_search, query, candidates, filters)
+        dense = self.vector_search(query, top_k=candidates, filters=filters)
+        try:
+            lexical = lexical_future.result()
+        except Exception as e:
+            print(f"[ERROR] Keyword search failed: {e}")
+            lexical = []
+
+        return fuse(dense, lexical, top_k, fusion=fusion, alpha=alpha)
+
+    def search(self, query: str, top_k: int = 10, filters: dict = None) -> list[RetrievedChunk]:
+        """
+        Search with the configured retrieval mode (settings.retrieval_mode).
+
+        With settings.small_to_big, the top_k child hits are expanded to
+        their parent sections, so fewer (longer) results may come back.
+        """
+        if settings.retrieval_mode == "hybrid":
+            chunks = self.hybrid_search(query, top_k=top_k, filters=filters)
+        else:
+            chunks = self.vector_search(query, top_k=top_k, filters=filters)
+        return self.expand(chunks)
+
+    def expand(self, chunks: list[RetrievedChunk]) -> list[RetrievedChunk]:
+        """Small-to-big expansion of child hits, when enabled."""
+        if not settings.small_to_big:
+            return chunks
+        return self.parent_expander.expand(chunks)
+
+    def search_batch(self, queries: list[str], top_k: int = 10, filters: list = None) -> list[list[RetrievedChunk]]:
+        """
+        Search many queries at the cost of about one round trip.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query
+            filters: Optional list with one retrieval filter (or None) per query
+
+        Returns:
+            One result list per query, in input order
+        """
+        if not queries:
+            return []
+        filters = filters or [None] * len(queries)
+        if settings.retrieval_mode != "hybrid":
+            return [self.expand(c) for c in self.vector_search_batch(queries, top_k=top_k, filters=filters)]
+
+        candidates = max(top_k, settings.hybrid_candidates)
+        lexical_future = self._executor.submit(
+            lambda: [self.keyword_search(q, candidates, f) for q, f in zip(queries, filters)]
+        )
+        dense = self.vector_search_batch(queries, top_k=candidates, filters=filters)
+        try:
+            lexical = lexical_future.result()
+        except Exception as e:
+            print(f"[ERROR] Keyword search failed: {e}")
+            lexical = [[] for _ in queries]
+
+        return [self.expand(fuse(dense_hits, lexical_hits, top_k)) for dense_hits, lexical_hits in zip(dense, lexical)]
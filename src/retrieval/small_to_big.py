@@ -0,0 +1,166 @@
+"""
+Small-to-big retrieval: match small child chunks, answer with their parent.
+
+With settings.small_to_big, ingestion indexes small child chunks
+(settings.child_chunk_size) for precise matching. At query time each hit
+is expanded to its parent section: the run of chunks of the same source
+file under the same header path, as recorded by MarkdownChunker. Hits
+from the same parent are merged into a single result, so the reranker
+and the generator see fewer, self-contained passages.
+
+A parent longer than settings.parent_max_chars is cut to a window of
+whole chunks around its hits. Lengths are measured in UTF-8 bytes, which
+is close to characters for this corpus.
+"""
+
+import hashlib
+import threading
+from typing import Optional
+
+import numpy as np
+
+from src.config import settings
+from src.ingestion.chunk_store import ChunkStore, open_chunk_store
+from src.retrieval.chunks import RetrievedChunk, join_spans
+
+
+class ParentExpander:
+    """Maps child hits to parent sections of the chunk store, opened lazily."""
+
+    def __init__(self, store: ChunkStore = None, max_chars: int = None):
+        self.max_chars = max_chars or settings.parent_max_chars
+        self._lock = threading.Lock()
+        self._store = store
+        self._loaded = store is not None
+        if store is not None:
+            self._build(store)
+
+    def _load(self) -> bool:
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                try:
+                    self._store = open_chunk_store()
+                except Exception as e:
+                    print(f"[ERROR] Chunk store unreadable: {e}")
+                if self._store is None:
+                    print("[WARN] No chunk store found, small-to-big returns child chunks")
+                else:
+                    self._build(self._store)
+        return self._store is not None
+
+    def _build(self, store: ChunkStore) -> None:
+        # A file is a (category, source_file) pair; the stem alone repeats across categories
+        self._n_sources = len(store.source_file_vocab)
+        files = (
+            np.asarray(store.columns["category"], dtype=np.int64) * self._n_sources
+            + np.asarray(store.columns["source_file"], dtype=np.int64)
+        )
+        headers = np.asarray(store.columns["headers"])
+        chunk_index = np.asarray(store.columns["chunk_index"], dtype=np.int64)
+
+        # A section is a maximal run of rows with the same file and header path
+        boundary = np.ones(len(store), dtype=bool)
+        boundary[1:] = (files[1:] != files[:-1]) | (headers[1:] != headers[:-1])
+        self.section_of = np.cumsum(boundary) - 1
+        starts = np.flatnonzero(boundary)
+        self.section_start = starts
+        self.section_end = np.append(starts[1:], len(store))
+
+        # (file code, chunk_index) -> row, for hits that only carry payload fields
+        self._stride = int(chunk_index.max()) + 1 if len(store) else 1
+        keys = files * self._stride + chunk_index
+        self._key_order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._key_order]
+        self._source_codes = {name: code for code, name in enumerate(store.source_file_vocab)}
+        self._category_codes = {name: code for code, name in enumerate(store.category_vocab)}
+
+    def row_of(self, chunk: RetrievedChunk) -> Optional[int]:
+        """Chunk store row of a retrieved chunk, or None if it isn't in the store."""
+        metadata = chunk.metadata or {}
+        source = self._source_codes.get(metadata.get("source_file"))
+        category = self._category_codes.get(metadata.get("category", ""))
+        index = metadata.get("chunk_index")
+        if source is None or category is None or index is None or not 0 <= index < self._stride:
+            return None
+        key = (category * self._n_sources + source) * self._stride + index
+        pos = int(np.searchsorted(self._sorted_keys, key))
+        if pos == len(self._sorted_keys) or self._sorted_keys[pos] != key:
+            return None
+        return int(self._key_order[pos])
+
+    def _length(self, start: int, end: int) -> int:
+        """Bytes of text in rows [start, end)."""
+        offsets = self._store.offsets
+        return int(offsets[end] - offsets[start])
+
+    def _window(self, rows: list[int], section: int) -> tuple[int, int]:
+        """Rows [start, end) around rows, grown one chunk per side while within max_chars."""
+        lower, upper = int(self.section_start[section]), int(self.section_end[section])
+        start, end = min(rows), max(rows) + 1
+        grew = True
+        while grew:
+            grew = False
+            if start > lower and self._length(start - 1, end) <= self.max_chars:
+                start -= 1
+                grew = True
+            if end < upper and self._length(start, end + 1) <= self.max_chars:
+                end += 1
+                grew = True
+        return start, end
+
+    def _groups(self, rows: list[int]) -> list[list[int]]:
+        """Split the sorted hit rows of one section into runs that fit in max_chars."""
+        groups = [[rows[0]]]
+        for row in rows[1:]:
+            if self._length(groups[-1][0], row + 1) <= self.max_chars:
+                groups[-1].append(row)
+            else:
+                groups.append([row])
+        return groups
+
+    def _parent(self, hits: list[tuple[int, RetrievedChunk]], start: int, end: int) -> RetrievedChunk:
+        store = self._store
+        best = max(hits, key=lambda hit: hit[1].score)[1]
+        first = store[start]
+        text = join_spans([store.text(row) for row in range(start, end)])
+        metadata = {
+            **first.metadata,
+            "content": text,
+            "content_hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "parent_chunk_indices": [int(store.columns["chunk_index"][row]) for row in range(start, end)],
+            "child_chunk_indices": sorted(c.metadata["chunk_index"] for _, c in hits),
+        }
+        return RetrievedChunk(text=text, citation=best.citation, score=best.score, metadata=metadata)
+
+    def expand(self, chunks: list[RetrievedChunk]) -> list[RetrievedChunk]:
+        """
+        Replace child hits (best first) with their parent passages.
+
+        Each parent takes the best score of its children and the rank of
+        its best child. Hits that can't be found in the chunk store are
+        passed through unchanged.
+        """
+        if not chunks or not self._load():
+            return chunks
+
+        # Keyed by section, or by the chunk itself when it isn't in the store
+        by_section: dict = {}
+        for chunk in chunks:
+            row = self.row_of(chunk)
+            key = ("chunk", id(chunk)) if row is None else int(self.section_of[row])
+            by_section.setdefault(key, []).append((row, chunk))
+
+        parents = []
+        for key, hits in by_section.items():
+            if hits[0][0] is None:
+                parents.append(hits[0][1])
+                continue
+            rows = sorted({row for row, _ in hits})
+            for group in self._groups(rows):
+                group_hits = [hit for hit in hits if hit[0] in group]
+                start, end = self._window(group, key)
+                parents.append(self._parent(group_hits, start, end))
+
+        return sorted(parents, key=lambda c: c.score, reverse=True)
+
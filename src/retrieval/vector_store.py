@@ -0,0 +1,279 @@
+"""
+Pluggable vector stores for dense retrieval.
+
+Backends (settings.vector_backend):
+- qdrant: the Qdrant server (default)
+- local: in-process exact search over the L2-normalized float32 vectors
+  that ingestion writes into the chunk store. No external service and no
+  network round trip; a query is one matmul plus argpartition.
+- ivf: in-process approximate search through an IVF index over the same
+  vectors (src/retrieval/ann.py), for corpora too large to scan per query.
+
+Every backend returns (payload, score) pairs, where payload has the same
+keys the indexer writes to Qdrant and score is cosine similarity.
+
+Searches take optional `filters`, mapping a payload field (source_file or
+category) to the accepted values, e.g. {"source_file": ["dragon"]}. Only
+matching chunks are candidates: Qdrant applies the filter inside the HNSW
+search through its keyword payload indexes, and the in-process backends
+scan just the matching rows.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import FieldCondition, Filter, MatchAny, QueryRequest, SearchParams
+
+from src.config import settings
+from src.ingestion.chunk_store import ChunkStore, open_chunk_store, validate_filters
+from src.ingestion.indexer import quantization_search_params
+from src.retrieval.ann import IVFIndex, load_ivf_index
+
+
+def qdrant_filter(filters: Optional[dict]) -> Optional[Filter]:
+    """Qdrant filter matching every field of a retrieval filter."""
+    if not filters:
+        return None
+    validate_filters(filters)
+    conditions = []
+    for field, values in filters.items():
+        if isinstance(values, str):
+            values = [values]
+        conditions.append(FieldCondition(key=field, match=MatchAny(any=list(values))))
+    return Filter(must=conditions)
+
+
+class VectorStore(ABC):
+    """Interface for dense top-k search."""
+
+    @abstractmethod
+    def search(self, query_vector: list[float], top_k: int = 10, filters: dict = None) -> list[tuple[dict, float]]:
+        """Top-k (payload, score) pairs, best first, among chunks matching filters."""
+
+    def search_batch(
+        self,
+        query_vectors: list[list[float]],
+        top_k: int = 10,
+        filters: list[Optional[dict]] = None,
+    ) -> list[list[tuple[dict, float]]]:
+        """One result list per query vector; filters, if given, holds one filter (or None) per query."""
+        filters = filters or [None] * len(query_vectors)
+        return [self.search(v, top_k, filters=f) for v, f in zip(query_vectors, filters)]
+
+
+class QdrantVectorStore(VectorStore):
+    """
+    Dense search against a Qdrant collection.
+
+    With a quantized collection, the search runs on quantized vectors with
+    `oversampling` x top_k candidates, which are rescored with the float
+    originals before the top_k are returned.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection: str,
+        hnsw_ef: int = 128,
+        quantization: str = "none",
+        oversampling: float = 2.0,
+    ):
+        self.client = client
+        self.collection = collection
+        self.hnsw_ef = hnsw_ef
+        self.search_params = SearchParams(
+            hnsw_ef=hnsw_ef,
+            exact=False,
+            quantization=quantization_search_params(quantization, oversampling),
+        )
+
+    def search(self, query_vector: list[float], top_k: int = 10, filters: dict = None) -> list[tuple[dict, float]]:
+        results = self.client.query_points(
+            collection_name=self.collection,
+            query=query_vector,
+            query_filter=qdrant_filter(filters),
+            limit=top_k,
+            search_params=self.search_params,
+            with_payload=True,
+        )
+        return [(r.payload, r.score) for r in results.points]
+
+    def _batch_requests(self, query_vectors, top_k: int, filters) -> list[QueryRequest]:
+        filters = filters or [None] * len(query_vectors)
+        return [
+            QueryRequest(
+                query=vector,
+                filter=qdrant_filter(f),
+                limit=top_k,
+                params=self.search_params,
+                with_payload=True,
+            )
+            for vector, f in zip(query_vectors, filters)
+        ]
+
+    def search_batch(
+        self,
+        query_vectors: list[list[float]],
+        top_k: int = 10,
+        filters: list[Optional[dict]] = None,
+    ) -> list[list[tuple[dict, float]]]:
+        """All queries in a single query_batch_points request."""
+        responses = self.client.query_batch_points(
+            collection_name=self.collection,
+            requests=self._batch_requests(query_vectors, top_k, filters),
+        )
+        return [[(r.payload, r.score) for r in response.points] for response in responses]
+
+
+class AsyncQdrantVectorStore(QdrantVectorStore):
+    """QdrantVectorStore over an AsyncQdrantClient; search() is a coroutine."""
+
+    async def search(self, query_vector: list[float], top_k: int = 10, filters: dict = None) -> list[tuple[dict, float]]:
+        results = await self.client.query_points(
+            collection_name=self.collection,
+            query=query_vector,
+            query_filter=qdrant_filter(filters),
+            limit=top_k,
+            search_params=self.search_params,
+            with_payload=True,
+        )
+        return [(r.payload, r.score) for r in results.points]
+
+    async def search_batch(
+        self,
+        query_vectors: list[list[float]],
+        top_k: int = 10,
+        filters: list[Optional[dict]] = None,
+    ) -> list[list[tuple[dict, float]]]:
+        responses = await self.client.query_batch_points(
+            collection_name=self.collection,
+            requests=self._batch_requests(query_vectors, top_k, filters),
+        )
+        return [[(r.payload, r.score) for r in response.points] for response in responses]
+
+
+class LocalVectorStore(VectorStore):
+    """Exact cosine search over the chunk store's memory-mapped vectors."""
+
+    def __init__(self, store: ChunkStore):
+        if store.vectors is None:
+            raise ValueError(f"Chunk store {store.store_dir} has no vectors, re-run ingestion")
+        self.store = store
+        self.vectors = store.vectors
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def payload(self, row: int) -> dict:
+        chunk = self.store[row]
+        return {"content": chunk.content, **chunk.metadata}
+
+    def search_rows(self, query_vector, top_k: int = 10, rows: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k (rows, scores) by cosine similarity, best first, optionally among `rows` only."""
+        if top_k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        if rows is None:
+            scores = self.vectors @ query
+        else:
+            scores = self.vectors[rows] @ query
+        if top_k < len(scores):
+            top = np.argpartition(scores, -top_k)[-top_k:]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return (top if rows is None else rows[top]), scores[top]
+
+    def search_rows_batch(self, query_vectors, top_k: int = 10) -> list[tuple[np.ndarray, np.ndarray]]:
+        """search_rows for many queries with a single matrix multiply."""
+        if top_k <= 0:
+            return [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in query_vectors]
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        scores = queries @ self.vectors.T
+        if top_k < scores.shape[1]:
+            top = np.argpartition(scores, -top_k, axis=1)[:, -top_k:]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        rows = np.take_along_axis(top, order, axis=1)
+        return list(zip(rows, np.take_along_axis(top_scores, order, axis=1)))
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> list[tuple[dict, float]]:
+        return [(self.payload(int(row)), float(score)) for row, score in zip(rows, scores)]
+
+    def search(self, query_vector: list[float], top_k: int = 10, filters: dict = None) -> list[tuple[dict, float]]:
+        rows = self.store.rows_matching(filters) if filters else None
+        return self._hits(*self.search_rows(query_vector, top_k, rows=rows))
+
+    def search_batch(
+        self,
+        query_vectors: list[list[float]],
+        top_k: int = 10,
+        filters: list[Optional[dict]] = None,
+    ) -> list[list[tuple[dict, float]]]:
+        """Unfiltered queries are scored together; filtered ones scan their own rows."""
+        filters = filters or [None] * len(query_vectors)
+        results = [None] * len(query_vectors)
+        plain = [i for i, f in enumerate(filters) if not f]
+        if plain:
+            batch = self.search_rows_batch([query_vectors[i] for i in plain], top_k)
+            for i, (rows, scores) in zip(plain, batch):
+                results[i] = self._hits(rows, scores)
+        for i, f in enumerate(filters):
+            if f:
+                results[i] = self.search(query_vectors[i], top_k, filters=f)
+        return results
+
+
+class IVFVectorStore(LocalVectorStore):
+    """Approximate cosine search through an IVF index over the chunk store's vectors."""
+
+    def __init__(self, store: ChunkStore, index: IVFIndex):
+        super().__init__(store)
+        self.index = index
+
+    def search_rows(self, query_vector, top_k: int = 10, rows: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        if rows is not None:
+            # A filter leaves few enough rows to score them all exactly
+            return super().search_rows(query_vector, top_k, rows=rows)
+        return self.index.search(query_vector, top_k)
+
+    def search_rows_batch(self, query_vectors, top_k: int = 10) -> list[tuple[np.ndarray, np.ndarray]]:
+        return [self.index.search(q, top_k) for q in query_vectors]
+
+
+def get_vector_store(
+    backend: str = "qdrant",
+    client: QdrantClient = None,
+    collection: str = None,
+    store: ChunkStore = None,
+) -> VectorStore:
+    """
+    Build the vector store for a backend name.
+
+    The in-process backends fall back to Qdrant (with a warning) when
+    there is no chunk store with vectors yet.
+    """
+    if backend in ("local", "ivf"):
+        store = store or open_chunk_store()
+        if store is not None and store.vectors is not None:
+            if backend == "ivf":
+                return IVFVectorStore(store, load_ivf_index(store))
+            return LocalVectorStore(store)
+        print("[WARN] No chunk store vectors found, falling back to Qdrant")
+    return QdrantVectorStore(
+        client,
+        collection,
+        quantization=settings.qdrant_quantization,
+        oversampling=settings.qdrant_oversampling,
+    )
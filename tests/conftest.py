@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Tests import the application as `src.*`, like the benchmarks do
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,35 @@
+"""IVF index builds on corpora smaller than the configured nlist."""
+
+import numpy as np
+
+from src.retrieval.ann import IVFIndex
+
+
+def _vectors(n: int, dim: int = 16) -> np.ndarray:
+    return np.random.default_rng(0).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_nlist_is_capped_at_corpus_size():
+    vectors = _vectors(50)
+    index = IVFIndex.build(vectors, nlist=100, nprobe=0)
+    assert index.nlist == 50
+    assert len(index) == 50
+    rows, _ = index.search(vectors[7], top_k=1, nprobe=index.nlist)
+    assert rows.tolist() == [7]
+
+
+def test_empty_corpus_builds_empty_index(tmp_path):
+    index = IVFIndex.build(_vectors(0), nlist=100, nprobe=0)
+    assert index.nlist == 0
+    assert len(index) == 0
+    rows, scores = index.search(_vectors(1)[0], top_k=5)
+    assert len(rows) == 0 and len(scores) == 0
+
+    index.save(tmp_path / "ivf")
+    assert len(IVFIndex.load(tmp_path / "ivf")) == 0
+
+
+def test_empty_centroids_are_retrained():
+    empty = IVFIndex.build(_vectors(0), nprobe=4)
+    index = IVFIndex.build(_vectors(50), nlist=100, nprobe=4, centroids=empty.centroids)
+    assert index.nlist == 50
@@ -0,0 +1,86 @@
+"""The offset-based MarkdownChunker._recursive_split matches the previous concatenation-based splitter."""
+
+import random
+
+import pytest
+
+from src.ingestion.chunker import MarkdownChunker
+
+
+def legacy_recursive_split(chunker: MarkdownChunker, text: str) -> list[str]:
+    """The pre-offset implementation, kept verbatim as the reference."""
+    if len(text) <= chunker.chunk_size:
+        return [text]
+
+    chunks = []
+    separators = ['\n\n', '\n', '. ', '! ', '? ']
+
+    for separator in separators:
+        if separator in text:
+            parts = text.split(separator)
+            current_chunk = ""
+
+            for part in parts:
+                part_with_sep = part + (separator if separator not in ['\n\n', '\n'] else '\n')
+
+                if len(current_chunk) + len(part_with_sep) <= chunker.chunk_size:
+                    current_chunk += part_with_sep
+                else:
+                    if current_chunk:
+                        chunks.append(current_chunk.strip())
+
+                    if chunker.chunk_overlap > 0 and current_chunk:
+                        overlap_text = current_chunk[-chunker.chunk_overlap:]
+                        current_chunk = overlap_text + part_with_sep
+                    else:
+                        current_chunk = part_with_sep
+
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+
+            if chunks:
+                return chunks
+
+    chunks = []
+    for i in range(0, len(text), chunker.chunk_size - chunker.chunk_overlap):
+        chunk = text[i:i + chunker.chunk_size]
+        if chunk.strip():
+            chunks.append(chunk.strip())
+
+    return chunks
+
+
+def _section(num_paragraphs: int, rng: random.Random) -> str:
+    words = "the dragon is a powerful sign born in years of fire life path seven seeks truth".split()
+
+    def sentence() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(5, 15)))
+
+    return "\n\n".join(
+        ". ".join(sentence() for _ in range(rng.randint(1, 6))) + "."
+        for _ in range(num_paragraphs)
+    )
+
+
+@pytest.mark.parametrize("separator", ["paragraphs", "lines", "sentences"])
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(512, 50), (2048, 200), (300, 0)])
+def test_matches_legacy_on_markdown(separator, chunk_size, chunk_overlap):
+    section = _section(400, random.Random(7))
+    text = {
+        "paragraphs": section,
+        "lines": section.replace("\n\n", "\n").replace(". ", ".\n"),
+        "sentences": section.replace("\n\n", " "),
+    }[separator]
+    chunker = MarkdownChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    assert chunker._recursive_split(text) == legacy_recursive_split(chunker, text)
+
+
+def test_matches_legacy_on_random_text():
+    # Runs of separators, leading/trailing breaks and overlaps up to chunk_size - 1
+    alphabet = ["a", "b", " ", "\n", ".", "!", "?", "x y", ". ", "\n\n", "! ", "? ", "\n\n\n"]
+    rng = random.Random(0)
+    for _ in range(5000):
+        size = rng.randint(2, 60)
+        chunker = MarkdownChunker(chunk_size=size, chunk_overlap=rng.choice([0, 1, 2, 5, 10, size - 1]))
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+        assert chunker._recursive_split(text) == legacy_recursive_split(chunker, text), repr(text)
@@ -0,0 +1,69 @@
+"""
+Score parity of the ONNX reranker backend with sentence-transformers.
+
+fp32 ONNX must reproduce CrossEncoder scores; the int8 model may drift
+slightly but must rank a fixed sample the same way. Skipped unless
+onnxruntime, sentence-transformers and an exported model directory
+(python -m src.retrieval.onnx_cross_encoder) are available.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from src.config import settings
+from src.ingestion.chunker import MarkdownChunker
+
+ort = pytest.importorskip("onnxruntime")
+sentence_transformers = pytest.importorskip("sentence_transformers")
+
+from src.retrieval.onnx_cross_encoder import FP32_FILE, INT8_FILE, OnnxCrossEncoder  # noqa: E402
+
+QUERIES = [
+    "What careers suit Life Path 7?",
+    "Dragon compatibility with Rat",
+    "lucky colors for the Year of the Dog",
+    "master number 11 spiritual meaning",
+]
+CANDIDATES = settings.rerank_top_k * 3
+ATOL = 1e-3
+
+if not (settings.reranker_onnx_dir / FP32_FILE).exists():
+    pytest.skip(f"no exported model in {settings.reranker_onnx_dir}", allow_module_level=True)
+
+
+@pytest.fixture(scope="module")
+def pair_sets() -> list[list[tuple[str, str]]]:
+    """CANDIDATES (query, passage) pairs per query, a fixed sample of the corpus."""
+    rng = random.Random(7)
+    chunker = MarkdownChunker(chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap)
+    passages = [c.content for c in chunker.chunk_directory(settings.data_raw_dir)]
+    if len(passages) < CANDIDATES:
+        pytest.skip(f"need {CANDIDATES} passages in {settings.data_raw_dir}, found {len(passages)}")
+    return [[(q, p) for p in rng.sample(passages, CANDIDATES)] for q in QUERIES]
+
+
+@pytest.fixture(scope="module")
+def reference(pair_sets) -> list[np.ndarray]:
+    model = sentence_transformers.CrossEncoder(settings.reranker_model)
+    return [np.asarray(model.predict(pairs), dtype=np.float32) for pairs in pair_sets]
+
+
+def _scores(model: OnnxCrossEncoder, pair_sets: list) -> list[np.ndarray]:
+    return [np.asarray(model.predict(pairs), dtype=np.float32) for pairs in pair_sets]
+
+
+def test_fp32_scores_match_cross_encoder(pair_sets, reference):
+    model = OnnxCrossEncoder(settings.reranker_onnx_dir)
+    for query, expected, actual in zip(QUERIES, reference, _scores(model, pair_sets)):
+        np.testing.assert_allclose(actual, expected, atol=ATOL, err_msg=query)
+
+
+def test_int8_ranks_match_cross_encoder(pair_sets, reference):
+    if not (settings.reranker_onnx_dir / INT8_FILE).exists():
+        pytest.skip(f"no {INT8_FILE} in {settings.reranker_onnx_dir}")
+    model = OnnxCrossEncoder(settings.reranker_onnx_dir, int8=True)
+    k = settings.rerank_top_k
+    for query, expected, actual in zip(QUERIES, reference, _scores(model, pair_sets)):
+        assert list(np.argsort(-actual)[:k]) == list(np.argsort(-expected)[:k]), query